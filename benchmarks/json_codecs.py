@@ -0,0 +1,40 @@
+"""JSON codecs benchmarks.
+
+Run from the project root::
+
+    python -m benchmarks.json_codecs
+"""
+
+from marnadi.utils import codecs
+
+from benchmarks.routing import bench
+
+payload = {
+    'items': [
+        {
+            'id': index,
+            'name': 'item {0}'.format(index),
+            'price': index * 1.5,
+            'tags': ['foo', 'bar', 'baz'],
+            'available': bool(index % 2),
+        }
+        for index in range(100)
+    ],
+    'total': 100,
+}
+
+
+def main():
+    for name, factory in codecs.json_codecs:
+        try:
+            codec = factory()
+        except ImportError:
+            print('{name:<40} not installed'.format(name=name))
+            continue
+        data = codec.dumps(payload)
+        bench(name + ': dumps', lambda: codec.dumps(payload), number=2000)
+        bench(name + ': loads', lambda: codec.loads(data), number=2000)
+
+
+if __name__ == '__main__':
+    main()
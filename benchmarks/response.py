@@ -0,0 +1,97 @@
+"""Full request benchmarks.
+
+Run from the project root::
+
+    python -m benchmarks.response
+"""
+
+import collections
+
+try:
+    import tracemalloc
+except ImportError:  # Python < 3.4
+    tracemalloc = None
+
+from marnadi import Response, JSONResponse, Route
+from marnadi.wsgi import App
+
+from benchmarks.routing import bench, start_response
+
+
+class HelloResponse(Response):
+
+    def get(self):
+        return 'Hello, World!'
+
+
+def peak_memory(name, func):
+    if tracemalloc is None:
+        return
+    func()  # warm up
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print('{name:<40} {peak:8d} bytes'.format(name=name, peak=peak))
+
+
+def main():
+    app = App(routes=[
+        Route('/', HelloResponse),
+        Route('/function', Response.get(lambda: 'Hello, World!')),
+        Route('/json', JSONResponse.get(lambda: {'hello': 'world'})),
+        Route('/json/stream', JSONResponse.get(
+            lambda: (dict(id=index) for index in range(100000)))),
+    ])
+
+    def request(path, method='GET'):
+        environ = dict(REQUEST_METHOD=method, PATH_INFO=path)
+        return lambda: b''.join(app(environ, start_response))
+
+    bench('GET (class)', request('/'))
+    bench('GET (function)', request('/function'))
+    bench('GET (JSON)', request('/json'))
+    bench('OPTIONS', request('/', method='OPTIONS'))
+    bench('405 Method Not Allowed', request('/', method='POST'))
+    bench('501 Not Implemented', request('/', method='FOO'))
+
+    def request_with_data():
+        environ = dict(
+            REQUEST_METHOD='GET',
+            PATH_INFO='/',
+            QUERY_STRING='foo=bar',
+            HTTP_COOKIE='foo=bar',
+        )
+
+        def _request():
+            response = app.get_handler('/')(app, app.make_request_object(
+                environ))
+            response.request.headers.get('Accept')
+            response.request.query.get('foo')
+            response.cookies.get('foo')
+            return b''.join(response)
+        return _request
+
+    bench('GET (headers, query, cookies)', request_with_data())
+
+    def start(handler):
+        request = app.make_request_object(dict(REQUEST_METHOD='GET'))
+        return lambda: b''.join(handler.start(app, request))
+
+    bench('start: str result', start(HelloResponse))
+    bench('start: iterable result', start(Response.get(
+        lambda: iter(['Hello, World!']))))
+    peak_memory('GET: peak memory', request('/'))
+    peak_memory('GET (headers, query, cookies): peak memory',
+                request_with_data())
+
+    def consume(path):
+        environ = dict(REQUEST_METHOD='GET', PATH_INFO=path)
+        return lambda: collections.deque(app(environ, start_response), 0)
+
+    peak_memory('GET (JSON, 100000 items streamed): peak memory',
+                consume('/json/stream'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Routing benchmarks.
+
+Run from the project root::
+
+    python -m benchmarks.routing
+"""
+
+import timeit
+
+from marnadi import Response, Route, http
+from marnadi.route import Routes
+from marnadi.wsgi import App
+
+handler = Response.get(lambda **kwargs: 'ok')
+
+
+def make_routes(count=50, depth=3):
+    if not depth:
+        return ()
+    return [
+        Route('/{0}'.format(index), handler, routes=make_routes(
+            count=count // 5,
+            depth=depth - 1,
+        ))
+        for index in range(count)
+    ] + [
+        Route('/item{0}/{{item}}'.format(index), handler, routes=make_routes(
+            count=count // 5,
+            depth=depth - 1,
+        ))
+        for index in range(count)
+    ]
+
+
+def make_placeholder_routes(count=100):
+    return [
+        Route('/{{user}}/action{0}/'.format(index), handler)
+        for index in range(count)
+    ]
+
+
+def start_response(status, headers):
+    pass
+
+
+def bench(name, func, number=20000):
+    elapsed = min(timeit.repeat(func, number=number, repeat=3))
+    print('{name:<40} {usec:8.2f} usec/call'.format(
+        name=name,
+        usec=elapsed / number * 1e6,
+    ))
+
+
+def main():
+    app = App(routes=make_routes())
+
+    def get_handler(path):
+        def _get_handler():
+            try:
+                app.get_handler(path)
+            except http.Error:
+                pass
+        return _get_handler
+
+    def request(path):
+        environ = dict(REQUEST_METHOD='GET', PATH_INFO=path)
+        return lambda: b''.join(app(environ, start_response))
+
+    bench('get_handler: hit', get_handler('/49/9/1'))
+    bench('get_handler: hit (placeholder)', get_handler('/item49/foo/9/1'))
+    bench('get_handler: miss (deep)', get_handler('/49/9/1/wp-admin'))
+    bench('get_handler: miss (placeholders)', get_handler('/item4/foo/x'))
+    bench('request: 200', request('/49/9/1'))
+    bench('request: 404', request('/49/9/1/wp-login.php'))
+
+    app = App(routes=make_routes(), cache_size=1000)
+    bench('get_handler: hit (cached)', get_handler('/49/9/1'))
+    bench('request: 200 (cached)', request('/49/9/1'))
+
+    for combined in (False, True):
+        app = App(routes=Routes(make_placeholder_routes(), combined=combined))
+        label = 'placeholder siblings{0}: '.format(
+            ' (combined)' if combined else '')
+        bench(label + 'last', get_handler('/user/action99/'))
+        bench(label + 'miss', get_handler('/user/action/'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,3 @@
-from marnadi.response import Response
+from marnadi.response import Response, JSONResponse, FileResponse, \
+    StaticFiles
 from marnadi.route import Route
@@ -1,9 +1,16 @@
 import functools
+import types
+
+try:
+    from types import MappingProxyType as frozendict
+except ImportError:  # Python < 3.3
+    frozendict = dict
 
 from .cookies import Cookies
-from .headers import Headers, Header
+from .headers import Headers, Header, RequestHeaders
 from .error import Error
 from .data import Data
+from .query import Query, QueryDict
 
 
 class Handler(type):
@@ -12,7 +19,56 @@ class Handler(type):
         for attribute, value in attributes.items():
             if isinstance(value, Method):
                 value.name = attribute
-        return super(Handler, mcs).__new__(mcs, name, mro, attributes)
+        cls = super(Handler, mcs).__new__(mcs, name, mro, attributes)
+        cls.update_http_methods()
+        return cls
+
+    def __setattr__(cls, attribute, value):
+        super(Handler, cls).__setattr__(attribute, value)
+        cls.update_http_methods()
+
+    def __delattr__(cls, attribute):
+        super(Handler, cls).__delattr__(attribute)
+        cls.update_http_methods()
+
+    def update_http_methods(cls):
+        """Build table of callbacks of supported HTTP methods.
+
+        Sets `http_methods` mapping HTTP method to the function which
+        takes response as the first argument (None if method is not
+        allowed) and `allow_header` with the list of allowed methods.
+        Tables of subclasses are rebuilt too since they inherit methods.
+        """
+        supported_http_methods = getattr(cls, 'supported_http_methods', None)
+        if supported_http_methods is not None:
+            http_methods = dict(
+                (method, cls.get_http_method_callback(method.lower()))
+                for method in supported_http_methods
+            )
+            type.__setattr__(cls, 'http_methods', frozendict(http_methods))
+            type.__setattr__(cls, 'allow_header', ', '.join(
+                method for method in supported_http_methods
+                if http_methods[method] is not None
+            ))
+        for subclass in cls.__subclasses__():
+            subclass.update_http_methods()
+
+    def get_http_method_callback(cls, attribute):
+        for base in cls.__mro__:
+            if attribute in vars(base):
+                value = vars(base)[attribute]
+                break
+        else:
+            return None
+        if isinstance(value, Method):
+            return value.func
+        if isinstance(value, types.FunctionType) or value is None:
+            return value
+        if isinstance(value, staticmethod):
+            func = value.__get__(None, cls)
+            return lambda response, **kwargs: func(**kwargs)
+        return lambda response, **kwargs: getattr(response, attribute)(
+            **kwargs)
 
     def start(cls, *args, **kwargs):
         raise NotImplementedError
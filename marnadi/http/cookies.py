@@ -13,7 +13,7 @@ class CookieJar(collections.MutableMapping):
 
     if hasattr(collections.MutableMapping, '__slots__'):
         __slots__ = ('_response', 'domain', 'path', 'expires', 'secure',
-                     'http_only', '__weakref__')
+                     'http_only', '__weakref__', '__dict__')
 
     def __init__(self, response, domain=None, path=None, expires=None,
                  secure=False, http_only=True, ):
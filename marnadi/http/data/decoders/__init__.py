@@ -1,3 +1,5 @@
+import zlib
+
 from marnadi.http import Error
 from marnadi.utils import metaclass
 
@@ -16,12 +18,80 @@ class Decoder(object):
 
     default_encoding = 'utf-8'
 
+    content_encodings = {
+        'identity': None,
+        'gzip': 16 + zlib.MAX_WBITS,
+        'x-gzip': 16 + zlib.MAX_WBITS,
+        'deflate': zlib.MAX_WBITS,
+    }
+
+    max_decompressed_size = 16 * 1024 * 1024  # unlimited if None
+
+    max_compression_ratio = 100  # unlimited if None
+
     def __call__(self, request):
         return self.decode(
-            data=request.input.read(request.content_length),
+            data=self.read(request),
             encoding=self.get_encoding(request.content_type)
         )
 
+    def read(self, request):
+        return b''.join(self.stream(request))
+
+    def stream(self, request, chunk_size=None):
+        """Iterate over the request body decompressed according
+        to its 'Content-Encoding'.
+
+        Unknown encodings are rejected with "415 Unsupported Media Type",
+        bodies exceeding :attr:`max_decompressed_size` or
+        :attr:`max_compression_ratio` with "413 Request Entity Too Large".
+        """
+        chunk_size = chunk_size or request.chunk_size
+        chunks = request.stream(chunk_size)
+        content_encoding = request.get('HTTP_CONTENT_ENCODING')
+        if content_encoding:
+            for encoding in reversed(content_encoding.split(',')):
+                chunks = self.decompress(chunks, encoding, chunk_size)
+        return chunks
+
+    def decompress(self, chunks, encoding, chunk_size):
+        try:
+            wbits = self.content_encodings[encoding.strip().lower()]
+        except KeyError:
+            raise Error('415 Unsupported Media Type')
+        if wbits is None:
+            return chunks
+        return self._decompress(chunks, zlib.decompressobj(wbits), chunk_size)
+
+    def _decompress(self, chunks, decompressor, chunk_size):
+        max_size = self.max_decompressed_size
+        max_ratio = self.max_compression_ratio
+        size_in = size_out = 0
+        try:
+            for chunk in chunks:
+                size_in += len(chunk)
+                while chunk:
+                    data = decompressor.decompress(chunk, chunk_size)
+                    chunk = decompressor.unconsumed_tail
+                    size_out += len(data)
+                    if max_size is not None and size_out > max_size or (
+                        max_ratio is not None and size_out > chunk_size and
+                        size_out > size_in * max_ratio
+                    ):
+                        raise Error('413 Request Entity Too Large')
+                    if data:
+                        yield data
+            data = decompressor.flush()
+        except zlib.error:
+            raise Error('400 Bad Request')
+        if data:
+            size_out += len(data)
+            if max_size is not None and size_out > max_size:
+                raise Error('413 Request Entity Too Large')
+            yield data
+        if not getattr(decompressor, 'eof', True):
+            raise Error('400 Bad Request')  # truncated body
+
     def get_encoding(self, content_type):
         return content_type and content_type.params.get(
             'charset') or self.default_encoding
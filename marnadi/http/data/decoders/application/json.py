@@ -1,15 +1,30 @@
-json = __import__('json')  # import built-in module 'json'
-
 from marnadi.http import Error
 from marnadi.http.data.decoders import Decoder as BaseDecoder
+from marnadi.utils import codecs
 
 
 class Decoder(BaseDecoder):
+    """Decoder of the 'application/json' body.
+
+    UTF-8 bodies are decoded directly from bytes by :attr:`codec`
+    or by the default JSON codec if it's not set.
+    """
 
     __slots__ = ()
 
+    codec = None
+
     def __call__(self, request):
+        return self.loads(
+            data=self.read(request),
+            encoding=self.get_encoding(request.content_type),
+        )
+
+    def loads(self, data, encoding):
+        if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            data = self.decode(data, encoding).encode('utf-8')
+        codec = self.codec or codecs.get_default_json_codec()
         try:
-            return json.loads(super(Decoder, self).__call__(request))
+            return codec.loads(data)
         except ValueError:
             raise Error('400 Bad Request')
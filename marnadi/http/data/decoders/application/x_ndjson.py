@@ -0,0 +1,42 @@
+from marnadi.http import Error
+from marnadi.http.data.decoders.application import json
+
+
+class Decoder(json.Decoder):
+    """Decoder of the 'application/x-ndjson' body.
+
+    Returns generator of records read line by line from the request body,
+    so only one line is kept in memory at once. Empty lines are skipped.
+    """
+
+    __slots__ = ()
+
+    chunk_size = 64 * 1024
+
+    max_line_size = 1024 * 1024
+
+    def __call__(self, request):
+        return self.records(
+            lines=self.lines(request),
+            encoding=self.get_encoding(request.content_type),
+        )
+
+    def lines(self, request):
+        tail = b''
+        for chunk in self.stream(request, self.chunk_size):
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()
+            if len(tail) > self.max_line_size:
+                raise Error('413 Request Entity Too Large')
+            for line in lines:
+                yield line
+        yield tail
+
+    def records(self, lines, encoding):
+        for line in lines:
+            if len(line) > self.max_line_size:
+                raise Error('413 Request Entity Too Large')
+            line = line.strip()
+            if not line:
+                continue
+            yield self.loads(line, encoding)
@@ -0,0 +1,224 @@
+import collections
+import re
+import tempfile
+
+from marnadi.http import Error
+from marnadi.http.data.decoders import Decoder as BaseDecoder
+
+
+class FormData(collections.Mapping):
+    """Fields of the form, item access returns the last value of the field,
+    use :meth:`getall` to get all of them.
+    """
+
+    if hasattr(collections.Mapping, '__slots__'):
+        __slots__ = 'fields',
+
+    def __init__(self):
+        self.fields = {}
+
+    def __getitem__(self, field):
+        return self.fields[field][-1]
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def add(self, field, value):
+        self.fields.setdefault(field, []).append(value)
+
+    def getall(self, field, default=()):
+        return list(self.fields.get(field, default))
+
+
+class File(object):
+    """Uploaded file.
+
+    Content is kept in memory until it exceeds `memory_size` bytes, after
+    that it's spilled to the temporary file.
+    """
+
+    __slots__ = 'name', 'filename', 'content_type', 'headers', 'file', 'size'
+
+    def __init__(self, name, filename, content_type, headers, memory_size):
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers
+        self.file = tempfile.SpooledTemporaryFile(max_size=memory_size)
+        self.size = 0
+
+    def write(self, data):
+        self.file.write(data)
+        self.size += len(data)
+
+    def read(self, *args):
+        return self.file.read(*args)
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def close(self):
+        self.file.close()
+
+
+class Decoder(BaseDecoder):
+    """Decoder of the 'multipart/form-data' body.
+
+    Body is parsed incrementally by chunks of `chunk_size` bytes, file
+    parts are written to :class:`File` objects, other ones are decoded
+    to strings.
+    """
+
+    __slots__ = ()
+
+    chunk_size = 64 * 1024
+
+    memory_size = 1024 * 1024  # max size of file kept in memory
+
+    max_part_size = None  # max size of any part, unlimited if None
+
+    max_field_size = 1024 * 1024  # max size of part which is not a file
+
+    max_size = None  # max total size of all parts, unlimited if None
+
+    max_headers_size = 16 * 1024  # max size of part headers and delimiter line
+
+    param_re = re.compile(r';\s*([^\s=;]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+
+    def __call__(self, request):
+        boundary = request.content_type.get('boundary', '').strip('"')
+        if not boundary:
+            raise Error('400 Bad Request')
+        form_data = FormData()
+        for part, value in self.parse(
+            chunks=self.stream(request, self.chunk_size),
+            boundary=boundary.encode('latin1'),
+        ):
+            form_data.add(part, value)
+        return form_data
+
+    def parse(self, chunks, boundary):
+        """Yield `(name, value)` pairs of the form parts."""
+        delimiter = b'\r\n--' + boundary
+        buffer = b'\r\n'  # first delimiter may not be preceded by CRLF
+        total_size = 0
+        part = None
+        chunks = iter(chunks)
+
+        # skip preamble
+        while True:
+            position = buffer.find(delimiter)
+            if position >= 0:
+                buffer = buffer[position + len(delimiter):]
+                break
+            buffer = buffer[-len(delimiter):] + self.next_chunk(chunks)
+
+        while True:
+            # end of the delimiter line
+            while len(buffer) < 2:
+                buffer += self.next_chunk(chunks)
+            if buffer.startswith(b'--'):
+                return  # close delimiter, epilogue is ignored
+            start = 0
+            while True:
+                position = buffer.find(b'\r\n', start)
+                if position >= 0:
+                    buffer = buffer[position + 2:]
+                    break
+                if len(buffer) > self.max_headers_size:
+                    raise Error('400 Bad Request')
+                start = len(buffer) - 1  # CR may be the last byte
+                buffer += self.next_chunk(chunks)
+
+            # part headers
+            while True:
+                position = buffer.find(b'\r\n\r\n')
+                if position >= 0:
+                    break
+                if len(buffer) > self.max_headers_size:
+                    raise Error('400 Bad Request')
+                buffer += self.next_chunk(chunks)
+            part = self.make_part(buffer[:position + 2])
+            buffer = buffer[position + 4:]
+
+            # part body
+            size = 0
+            while True:
+                position = buffer.find(delimiter)
+                if position >= 0:
+                    data = buffer[:position]
+                else:
+                    # end of buffer may contain beginning of the delimiter
+                    keep = len(delimiter) - 1
+                    data, buffer = buffer[:-keep], buffer[-keep:]
+                size += len(data)
+                total_size += len(data)
+                self.check_size(part, size, total_size)
+                part.write(data)
+                if position >= 0:
+                    buffer = buffer[position + len(delimiter):]
+                    break
+                buffer += self.next_chunk(chunks)
+            yield part.name, self.make_value(part)
+
+    @staticmethod
+    def next_chunk(chunks):
+        chunk = next(chunks, None)
+        if not chunk:
+            raise Error('400 Bad Request')  # unexpected end of the body
+        return chunk
+
+    def check_size(self, part, size, total_size):
+        limits = [(self.max_size, total_size), (self.max_part_size, size)]
+        if part.filename is None:
+            limits.append((self.max_field_size, size))
+        for limit, value in limits:
+            if limit is not None and value > limit:
+                raise Error('413 Request Entity Too Large')
+
+    def make_part(self, data):
+        headers = {}
+        for line in self.decode(data, 'utf-8').split('\r\n'):
+            header, _, value = line.partition(':')
+            if header:
+                headers[header.strip().title()] = value.strip()
+        disposition = self.parse_header(headers.get('Content-Disposition'))
+        if disposition is None or 'name' not in disposition[1]:
+            raise Error('400 Bad Request')
+        return File(
+            name=disposition[1]['name'],
+            filename=disposition[1].get('filename'),
+            content_type=self.parse_header(headers.get('Content-Type')),
+            headers=headers,
+            memory_size=self.memory_size,
+        )
+
+    def make_value(self, part):
+        part.seek(0)
+        if part.filename is not None:
+            return part
+        encoding = self.default_encoding
+        if part.content_type is not None:
+            encoding = part.content_type[1].get('charset', encoding)
+        value = self.decode(part.read(), encoding)
+        part.close()
+        return value
+
+    def parse_header(self, value):
+        """Return `(value, params)` of the header with params."""
+        if value is None:
+            return None
+        main_value, _, params = value.partition(';')
+        return main_value.strip(), dict(
+            (param.lower(), self.unquote(param_value.strip()))
+            for param, param_value in self.param_re.findall(';' + params)
+        )
+
+    @staticmethod
+    def unquote(value):
+        if len(value) > 1 and value[0] == value[-1] == '"':
+            return re.sub(r'\\(.)', r'\1', value[1:-1])
+        return value
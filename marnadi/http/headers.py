@@ -61,7 +61,7 @@ class Header(collections.Mapping):
 class HeadersMixin(collections.Mapping):
 
     if hasattr(collections.Mapping, '__slots__'):
-        __slots__ = '__weakref__',
+        __slots__ = '__weakref__', '__dict__'
 
     def __getitem__(self, header):
         return self._headers[header.title()]
@@ -128,6 +128,63 @@ class ResponseHeaders(HeadersMixin, collections.MutableMapping):
             self._headers.clear()
 
 
+class RequestHeaders(collections.Mapping):
+    """Case-insensitive view of the request headers kept in WSGI environ.
+
+    Every header is looked up directly in the environ by its key, e.g.
+    'X-Foo' -> 'HTTP_X_FOO', and cached when read. Dict of all headers
+    is built only when iterating.
+    """
+
+    if hasattr(collections.Mapping, '__slots__'):
+        __slots__ = 'environ', 'cache', '_headers'
+
+    special_keys = frozenset(('CONTENT_TYPE', 'CONTENT_LENGTH'))
+
+    def __init__(self, environ):
+        self.environ = environ
+        self.cache = {}
+        self._headers = None
+
+    def __getitem__(self, header):
+        try:
+            return self.cache[header]
+        except KeyError:
+            pass
+        env_key = header.upper().replace('-', '_')
+        if env_key not in self.special_keys:
+            env_key = 'HTTP_' + env_key
+        value = self.cache[header] = self.environ[env_key]
+        return value
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def to_dict(self):
+        """Return dict of all request headers."""
+        if self._headers is None:
+            self._headers = dict(
+                (name.title().replace('_', '-'), value)
+                for name, value in
+                itertools.chain(
+                    (
+                        (env_key, self.environ[env_key])
+                        for env_key in self.special_keys
+                        if env_key in self.environ
+                    ),
+                    (
+                        (env_key[5:], env_value)
+                        for env_key, env_value in self.environ.items()
+                        if env_key.startswith('HTTP_')
+                    ),
+                )
+            )
+        return self._headers
+
+
 class Headers(CachedDescriptor, HeadersMixin):
 
     __slots__ = ()
@@ -0,0 +1,75 @@
+import collections
+try:
+    from urllib import parse
+except ImportError:
+    import urlparse as parse
+
+from marnadi.http import Error
+from marnadi.utils import CachedDescriptor
+
+
+class QueryDict(collections.Mapping):
+    """Params of the query string, parsed on first access.
+
+    Keeps all values of every param, item access returns the last one,
+    use :meth:`getall` to get all of them.
+    """
+
+    if hasattr(collections.Mapping, '__slots__'):
+        __slots__ = 'query_string', '_params'
+
+    def __init__(self, query_string):
+        self.query_string = query_string
+        self._params = None
+
+    def __getitem__(self, param):
+        return self.params[param][-1]
+
+    def __iter__(self):
+        return iter(self.params)
+
+    def __len__(self):
+        return len(self.params)
+
+    @property
+    def params(self):
+        if self._params is None:
+            params = {}
+            for param, value in parse.parse_qsl(
+                self.query_string,
+                keep_blank_values=True,
+            ):
+                params.setdefault(param, []).append(value)
+            self._params = params
+        return self._params
+
+    def getall(self, param, default=()):
+        return list(self.params.get(param, default))
+
+
+class Query(CachedDescriptor):
+    """Query string params of the request.
+
+    Args:
+        max_fields (int): max number of fields, "400 Bad Request" is
+            raised when exceeded.
+        max_length (int): max length of the query string,
+            "414 Request-URI Too Long" is raised when exceeded.
+    """
+
+    __slots__ = 'max_fields', 'max_length'
+
+    def __init__(self, max_fields=1000, max_length=8192):
+        super(Query, self).__init__()
+        self.max_fields = max_fields
+        self.max_length = max_length
+
+    def get_value(self, request):
+        query_string = request.query_string or ''
+        if self.max_length is not None and len(query_string) > self.max_length:
+            raise Error('414 Request-URI Too Long')
+        # ';' is a separator too for parse_qsl() of older Pythons
+        separators = query_string.count('&') + query_string.count(';')
+        if self.max_fields is not None and separators >= self.max_fields:
+            raise Error('400 Bad Request')
+        return QueryDict(query_string)
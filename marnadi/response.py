@@ -1,9 +1,23 @@
+import calendar
 import collections
+import datetime
+import errno
+import hashlib
 import itertools
 import logging
+import mimetypes
+import mmap
+import os
+import stat
+import uuid
+import zlib
+
+from email import utils as email_utils
+from wsgiref.util import FileWrapper
 
 from marnadi import http
-from marnadi.utils import to_bytes, cached_property, coroutine, metaclass
+from marnadi.utils import to_bytes, cached_property, coroutine, metaclass, \
+    codecs, ClosingIterator, LRUCache
 
 try:
     str = unicode
@@ -23,7 +37,7 @@ class Response(object):
     )
 
     if hasattr(collections.Iterator, '__slots__'):
-        __slots__ = 'app', 'request', '__weakref__'
+        __slots__ = 'app', 'request', '__weakref__', '__dict__'
 
     headers = http.Headers(
         ('Content-Type', http.Header('text/plain', charset='utf-8')),
@@ -31,64 +45,136 @@ class Response(object):
 
     cookies = http.Cookies()
 
+    max_body_size = None  # overrides App's max body size if set
+
+    body = ()  # iterable of bytes chunks, set by start()
+
+    buffer_size = None  # coalesce streamed chunks up to this size if set
+
+    FLUSH = object()  # yield it to send buffered chunks immediately
+
+    etag = False  # whether to add ETag to simple bodies automatically
+
+    accept_ranges = False  # whether to serve Range requests of simple bodies
+
+    max_ranges = 10  # Range requests with more ranges get full body
+
+    compression = None  # whether to compress body, App's setting if None
+
+    compression_level = 6
+
+    compression_min_size = 1024  # smaller bodies of known size are sent as is
+
+    compression_encodings = (  # in order of preference
+        ('gzip', 16 + zlib.MAX_WBITS),
+        ('deflate', zlib.MAX_WBITS),
+    )
+
+    uncompressible_types = (  # Content-Type prefixes of compressed data
+        'image/', 'audio/', 'video/', 'font/woff', 'application/zip',
+        'application/gzip', 'application/x-gzip', 'application/x-bzip2',
+        'application/x-xz', 'application/x-7z-compressed',
+        'application/x-rar-compressed', 'application/octet-stream',
+    )
+
     def __init__(self, app, request):
         self.app = app
         self.request = request
+        if self.max_body_size is not None:
+            request.max_body_size = self.max_body_size
 
     def __call__(self, **kwargs):
-        if self.request.method not in self.supported_http_methods:
+        try:
+            callback = self.http_methods[self.request.method]
+        except KeyError:
             raise http.Error(
                 '501 Not Implemented',
-                headers=(('Allow', ', '.join(self.allowed_http_methods)), )
+                headers=(('Allow', self.allow_header), )
             )
-        callback = getattr(self, self.request.method.lower())
         if callback is None:
             raise http.Error(
                 '405 Method Not Allowed',
-                headers=(('Allow', ', '.join(self.allowed_http_methods)), )
+                headers=(('Allow', self.allow_header), )
             )
-        return callback(**kwargs)
+        self.check_request()
+        return callback(self, **kwargs)
+
+    def check_request(self):
+        """Validate request before handling it.
+
+        Rejects requests with too large body before reading it.
+        """
+        if self.request.max_body_size is not None:
+            self.request.content_length  # raises error if body is too large
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        return next(self.iterator)
+        return next(self.chunks)
 
     def next(self):
         return self.__next__()
 
+    @cached_property
+    def chunks(self):
+        return iter(self.body)
+
     @cached_property
     @coroutine
     def iterator(self):
         result = yield
-        if result is None or isinstance(result, (str, bytes)):
-            chunk = to_bytes(result)
-            self.headers['Content-Length'] = len(chunk)
-            yield chunk
+        chunks = iter(result)
+        first_chunk = next(chunks, b'')
+        if first_chunk is self.FLUSH:
+            first_chunk = b''
+        first_chunk = to_bytes(first_chunk)
+        try:
+            result_length = len(result)
+        except TypeError:  # result doesn't support len()
+            pass
         else:
-            chunks = iter(result)
-            first_chunk = to_bytes(next(chunks, b''))
-            try:
-                result_length = len(result)
-            except TypeError:  # result doesn't support len()
-                pass
-            else:
-                if result_length <= 1:
-                    self.headers['Content-Length'] = len(first_chunk)
-            yield first_chunk
-            for chunk in chunks:
+            if result_length <= 1:
+                self.headers['Content-Length'] = len(first_chunk)
+        yield first_chunk  # sent immediately regardless of buffering
+        if self.buffer_size:
+            for chunk in self.coalesce(chunks, self.buffer_size):
+                yield chunk
+            return
+        for chunk in chunks:
+            if chunk is not self.FLUSH:
                 yield to_bytes(chunk, error_callback=self.logger.exception)
 
+    def coalesce(self, chunks, buffer_size):
+        """Join chunks until their size reaches `buffer_size` bytes
+        or :attr:`FLUSH` is met.
+        """
+        buffer, size = [], 0
+        for chunk in chunks:
+            if chunk is not self.FLUSH:
+                chunk = to_bytes(chunk, error_callback=self.logger.exception)
+                buffer.append(chunk)
+                size += len(chunk)
+                if size < buffer_size:
+                    continue
+            if buffer:
+                yield b''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b''.join(buffer)
+
     @classmethod
     def start(cls, *args, **params):
         try:
             response = cls(*args)
             result = response(**params)
-            response.iterator = itertools.chain(
-                (response.iterator.send(result), ),
-                response.iterator
-            )
+            if response.compression is None:
+                response.compression = response.app.compression
+            response.body = response.make_body(result)
+            response.make_conditional()
+            response.make_partial()
+            if response.compression:
+                response.compress()
             return response
         except http.Error:
             raise
@@ -96,15 +182,368 @@ class Response(object):
             cls.logger.exception(error)
             raise
 
+    def make_body(self, result):
+        """Make iterable of bytes chunks from the result of the handler."""
+        if result is None or isinstance(result, (str, bytes)):
+            body = to_bytes(result)
+            self.headers['Content-Length'] = len(body)
+            return [body]
+        return itertools.chain(
+            (self.iterator.send(result), ),
+            self.iterator
+        )
+
+    def make_conditional(self):
+        """Replace response with bodiless "304 Not Modified" if client
+        has its actual version.
+
+        Adds strong ETag to simple bodies if :attr:`etag` is set.
+        "304 Not Modified" keeps 'Vary' and weak 'ETag' which would be set
+        by :meth:`compress`.
+        """
+        request = self.request
+        if request.method not in ('GET', 'HEAD'):
+            return
+        if not self.status.startswith('200'):
+            return
+        headers = self.headers
+        if self.etag and isinstance(self.body, list) and not headers.get(
+            'ETag'
+        ):
+            headers['ETag'] = '"{0}"'.format(
+                hashlib.sha1(self.body[0]).hexdigest())
+        environ = request.environ
+        if 'HTTP_IF_NONE_MATCH' not in environ and (
+            'HTTP_IF_MODIFIED_SINCE' not in environ
+        ):
+            return
+        if not self.is_modified():
+            if self.compression:
+                self.get_compression_encoding()
+            self.status = '304 Not Modified'
+            headers.clear('Content-Type', 'Content-Length')
+            close = getattr(self.body, 'close', None)
+            if close is not None:
+                close()
+            self.body = []
+
+    def is_modified(self, etag=None, last_modified=None):
+        """Check request's 'If-None-Match' and 'If-Modified-Since'
+        against response's 'ETag' and 'Last-Modified'.
+
+        Handlers may call it before computing the body and return `None`
+        if it returns `False`, response is replaced with "304 Not Modified"
+        then.
+
+        Args:
+            etag (str): sets 'ETag' header, quoted if needed.
+            last_modified (datetime.datetime | float): sets 'Last-Modified'
+                header, naive datetime is considered as UTC.
+
+        Returns:
+            bool: `False` if client has actual version of the resource.
+        """
+        headers = self.headers
+        if etag is not None:
+            if not etag.startswith(('"', 'W/"')):
+                etag = '"{0}"'.format(etag)
+            headers['ETag'] = etag
+        if last_modified is not None:
+            if isinstance(last_modified, datetime.datetime):
+                last_modified = calendar.timegm(last_modified.utctimetuple())
+            headers['Last-Modified'] = email_utils.formatdate(
+                last_modified, usegmt=True)
+        if self.request.method not in ('GET', 'HEAD'):
+            return True
+        if_none_match = self.request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            if if_none_match.strip() == '*':
+                return False
+            etag = headers.get('ETag')
+            if not etag:
+                return True
+            etag = str(etag[0]).replace('W/', '', 1)
+            return etag not in (
+                value.strip().replace('W/', '', 1)
+                for value in if_none_match.split(',')
+            )
+        if_modified_since = self.request.headers.get('If-Modified-Since')
+        last_modified = headers.get('Last-Modified')
+        if if_modified_since and last_modified:
+            if_modified_since = email_utils.parsedate_tz(if_modified_since)
+            last_modified = email_utils.parsedate_tz(str(last_modified[0]))
+            if if_modified_since and last_modified:
+                return (
+                    email_utils.mktime_tz(last_modified) >
+                    email_utils.mktime_tz(if_modified_since)
+                )
+        return True
+
+    def make_partial(self):
+        """Replace response with "206 Partial Content" containing ranges
+        requested by 'Range' header if :attr:`accept_ranges` is set.
+
+        Several ranges are sent as 'multipart/byteranges', unsatisfiable
+        ones are rejected with "416 Requested Range Not Satisfiable".
+        """
+        if not self.accept_ranges or not self.status.startswith('200'):
+            return
+        if self.request.method not in ('GET', 'HEAD'):
+            return
+        size = self.get_body_size()
+        if size is None:
+            return
+        headers = self.headers
+        headers['Accept-Ranges'] = 'bytes'
+        environ = self.request.environ
+        range_header = environ.get('HTTP_RANGE')
+        if not range_header:
+            return
+        if_range = environ.get('HTTP_IF_RANGE')
+        if if_range and not self.check_if_range(if_range):
+            return
+        ranges = self.parse_range(range_header, size)
+        if ranges is None:
+            return
+        close = getattr(self.body, 'close', None)
+        if not ranges:
+            if close is not None:
+                close()
+            raise http.Error(
+                '416 Requested Range Not Satisfiable',
+                headers=(('Content-Range', 'bytes */{0}'.format(size)), ),
+            )
+        self.status = '206 Partial Content'
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers['Content-Range'] = 'bytes {0}-{1}/{2}'.format(
+                start, end, size)
+            headers['Content-Length'] = end - start + 1
+            chunks = self.iter_range(self.body, start, end + 1)
+        else:
+            boundary = uuid.uuid4().hex
+            content_type = headers.get('Content-Type') or ['']
+            parts = [
+                (start, end, to_bytes(
+                    '--{boundary}\r\nContent-Type: {content_type}\r\n'
+                    'Content-Range: bytes {start}-{end}/{size}\r\n'
+                    '\r\n'.format(
+                        boundary=boundary,
+                        content_type=content_type[0],
+                        start=start,
+                        end=end,
+                        size=size,
+                    )
+                ))
+                for start, end in ranges
+            ]
+            closing = to_bytes('--{0}--\r\n'.format(boundary))
+            headers['Content-Type'] = http.Header(
+                'multipart/byteranges', boundary=boundary)
+            headers['Content-Length'] = len(closing) + sum(
+                len(part_headers) + end - start + 3
+                for start, end, part_headers in parts
+            )
+            chunks = self.iter_multipart(self.body, parts, closing)
+
+        def close_body():
+            chunks.close()
+            if close is not None:
+                close()
+
+        self.body = ClosingIterator(chunks, close_body)
+
+    def get_body_size(self):
+        """Return size of the body if it supports ranges, `None` otherwise.
+        """
+        if isinstance(self.body, list) and len(self.body) == 1:
+            return len(self.body[0])
+        return None
+
+    def iter_range(self, body, start, stop):
+        yield body[0][start:stop]
+
+    def iter_multipart(self, body, parts, closing):
+        for start, end, part_headers in parts:
+            yield part_headers
+            for chunk in self.iter_range(body, start, end + 1):
+                yield chunk
+            yield b'\r\n'
+        yield closing
+
+    def check_if_range(self, if_range):
+        """Check whether 'If-Range' matches the current version."""
+        if if_range.startswith('W/'):
+            return False
+        if if_range.startswith('"'):
+            etag = self.headers.get('ETag')
+            return bool(etag) and str(etag[0]) == if_range
+        last_modified = self.headers.get('Last-Modified')
+        if not last_modified:
+            return False
+        if_range = email_utils.parsedate_tz(if_range)
+        last_modified = email_utils.parsedate_tz(str(last_modified[0]))
+        return bool(if_range and last_modified) and (
+            email_utils.mktime_tz(if_range) ==
+            email_utils.mktime_tz(last_modified)
+        )
+
+    def parse_range(self, range_header, size):
+        """Parse 'Range' header.
+
+        Returns:
+            list: satisfiable ranges as (first, last) byte positions,
+                `None` if header is invalid and should be ignored.
+        """
+        unit, _, ranges_spec = range_header.partition('=')
+        if unit.strip().lower() != 'bytes':
+            return None
+        specs = ranges_spec.split(',')
+        if len(specs) > self.max_ranges:
+            return None
+        ranges = []
+        for spec in specs:
+            first, dash, last = spec.strip().partition('-')
+            if not dash or not (first or last):
+                return None
+            if first and not first.isdigit() or last and not last.isdigit():
+                return None
+            if not first:  # suffix range
+                if int(last) == 0 or size == 0:
+                    continue
+                ranges.append((max(size - int(last), 0), size - 1))
+                continue
+            first, last = int(first), int(last) if last else None
+            if last is not None and last < first:
+                return None
+            if first < size:
+                last = size - 1 if last is None else min(last, size - 1)
+                ranges.append((first, last))
+        return ranges
+
+    def compress(self):
+        """Compress body using the best encoding accepted by the client.
+
+        Bodies of simple results are compressed at once, streamed ones
+        are compressed chunk by chunk, each chunk is flushed to not delay
+        it (see :attr:`buffer_size` to make chunks bigger).
+        """
+        encoding = self.get_compression_encoding()
+        if encoding is None:
+            return
+        compressor = zlib.compressobj(
+            self.compression_level,
+            zlib.DEFLATED,
+            dict(self.compression_encodings)[encoding],
+        )
+        headers = self.headers
+        headers['Content-Encoding'] = encoding
+        if isinstance(self.body, list):
+            body = b''.join(map(compressor.compress, self.body))
+            body += compressor.flush()
+            headers['Content-Length'] = len(body)
+            self.body = [body]
+        else:
+            headers.clear('Content-Length')
+            close = getattr(self.body, 'close', None)
+            chunks = self.compress_stream(self.body, compressor)
+
+            def close_body():
+                chunks.close()
+                if close is not None:
+                    close()
+
+            self.body = ClosingIterator(chunks, close_body)
+
+    def get_compression_encoding(self):
+        """Decide whether body should be compressed and set headers
+        depending on it: 'Vary' and weak 'ETag'.
+
+        Returns:
+            str: name of the encoding or `None` if body should be sent
+                as is.
+        """
+        headers = self.headers
+        if headers.get('Content-Encoding') or not self.status.startswith(
+            '200'
+        ):
+            return None
+        content_type = headers.get('Content-Type') or ['']
+        if str(content_type[0]).lower().startswith(self.uncompressible_types):
+            return None
+        content_length = headers.get('Content-Length')
+        if content_length and (
+            int(content_length[0]) < self.compression_min_size
+        ):
+            return None
+        vary = [str(value) for value in headers.get('Vary', ())]
+        vary_fields = set(
+            field.strip().lower()
+            for value in vary for field in value.split(',')
+        )
+        if not vary_fields & set(['*', 'accept-encoding']):
+            headers['Vary'] = ', '.join(vary + ['Accept-Encoding'])
+        encoding = self.get_content_encoding()
+        if encoding is None:
+            return None
+        etag = headers.get('ETag')
+        if etag and not str(etag[0]).startswith('W/'):
+            headers['ETag'] = 'W/' + str(etag[0])  # body is changed
+        return encoding
+
+    @staticmethod
+    def compress_stream(chunks, compressor):
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(
+                zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+    def get_content_encoding(self, encodings=None):
+        """Choose encoding of the body according to q-values
+        of the request's 'Accept-Encoding' header.
+
+        Args:
+            encodings (iterable): names of available encodings in order
+                of preference, :attr:`compression_encodings` by default.
+
+        Returns:
+            str: name of the encoding or `None` if body should be sent
+                as is.
+        """
+        accept_encoding = self.request.headers.get('Accept-Encoding')
+        if not accept_encoding:
+            return None
+        qualities = {}
+        for coding in accept_encoding.split(','):
+            coding, _, params = coding.partition(';')
+            quality = 1
+            for param in params.split(';'):
+                name, _, value = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0
+            qualities[coding.strip().lower()] = quality
+        default_quality = qualities.get('*', 0)
+        best_encoding, best_quality = None, 0
+        if encodings is None:
+            encodings = (name for name, wbits in self.compression_encodings)
+        for encoding in encodings:
+            quality = qualities.get(encoding, default_quality)
+            if quality > best_quality:
+                best_encoding, best_quality = encoding, quality
+        return best_encoding
+
     @property
     def allowed_http_methods(self):
         for method in self.supported_http_methods:
-            if getattr(self, method.lower()):
+            if self.http_methods[method] is not None:
                 yield method
 
     @http.Method
     def options(self, **kwargs):
-        self.headers['Allow'] = ', '.join(self.allowed_http_methods)
+        self.headers['Allow'] = self.allow_header
 
     get = http.Method()
 
@@ -117,3 +556,224 @@ class Response(object):
     patch = http.Method()
 
     delete = http.Method()
+
+
+class JSONResponse(Response):
+    """Response encoding result of the handler to JSON.
+
+    Result is encoded at once and sent with 'Content-Length' unless it's
+    a generator, an iterator or a list (tuple) of more than
+    :attr:`streaming_threshold` items, such results are encoded item by
+    item and sent by chunks of about :attr:`chunk_size` bytes. `None` is
+    sent as empty body.
+    """
+
+    headers = http.Headers(
+        ('Content-Type', 'application/json'),
+    )
+
+    codec = None  # default JSON codec is used if None
+
+    streaming_threshold = 1000
+
+    chunk_size = 64 * 1024
+
+    def __call__(self, **kwargs):
+        return self.encode(super(JSONResponse, self).__call__(**kwargs))
+
+    def encode(self, result):
+        if result is None:
+            return None
+        codec = self.codec or codecs.get_default_json_codec()
+        if isinstance(result, (list, tuple)):
+            if len(result) <= self.streaming_threshold:
+                return codec.dumps(result)
+        elif not isinstance(result, collections.Iterator):
+            return codec.dumps(result)
+        return self.stream(result, codec)
+
+    def stream(self, items, codec):
+        dumps, chunk_size = codec.dumps, self.chunk_size
+        chunk = bytearray(b'[')
+        separator = b''
+        for item in items:
+            chunk += separator
+            chunk += dumps(item)
+            separator = b','
+            if len(chunk) >= chunk_size:
+                yield bytes(chunk)
+                del chunk[:]
+        chunk += b']'
+        yield bytes(chunk)
+
+
+class FileResponse(Response):
+    """Response sending file returned by the handler.
+
+    Handler may return file object opened in binary mode or path to the file.
+    File is passed to the server's 'wsgi.file_wrapper' if it's available
+    (so server may use `sendfile`), otherwise it's read by chunks of
+    :attr:`chunk_size` bytes using :class:`wsgiref.util.FileWrapper`.
+    'Content-Length' and 'Last-Modified' are taken from the file's stat,
+    'Content-Type' is guessed by its name unless set by the handler.
+    Other results are sent as usual.
+    """
+
+    headers = http.Headers(
+        ('Content-Type', 'application/octet-stream'),
+    )
+
+    default_content_type = 'application/octet-stream'
+
+    chunk_size = 64 * 1024
+
+    accept_ranges = True
+
+    file = None
+
+    file_size = None  # size of the rest of the regular file
+
+    def make_body(self, result):
+        if result is not None and isinstance(result, (str, bytes)):
+            result = self.open(result)
+        if not hasattr(result, 'fileno'):
+            return super(FileResponse, self).make_body(result)
+        self.file = result
+        self.set_file_headers(result)
+        file_wrapper = self.request.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(result, self.chunk_size)
+
+    @staticmethod
+    def open(path):
+        try:
+            return open(path, 'rb')
+        except (IOError, OSError) as error:
+            if error.errno in (errno.ENOENT, errno.ENOTDIR, errno.EISDIR):
+                raise http.Error('404 Not Found')
+            raise
+
+    def set_file_headers(self, file):
+        headers = self.headers
+        file_stat = os.fstat(file.fileno())
+        if stat.S_ISREG(file_stat.st_mode):
+            self.file_size = file_stat.st_size - file.tell()
+            headers['Content-Length'] = self.file_size
+            if not headers.get('Last-Modified'):
+                headers['Last-Modified'] = email_utils.formatdate(
+                    file_stat.st_mtime, usegmt=True)
+        content_type = headers.get('Content-Type')
+        if content_type and content_type[0] != self.default_content_type:
+            return
+        name = getattr(file, 'name', None)
+        if isinstance(name, (str, bytes)):
+            try:
+                guessed_type = mimetypes.guess_type(name, strict=False)[0]
+            except TypeError:  # bytes name on Python 3
+                return
+            if guessed_type is not None:
+                headers['Content-Type'] = guessed_type
+
+    def get_body_size(self):
+        if self.file is None:
+            return super(FileResponse, self).get_body_size()
+        return self.file_size
+
+    def iter_range(self, body, start, stop):
+        if self.file is None:
+            for chunk in super(FileResponse, self).iter_range(
+                body, start, stop,
+            ):
+                yield chunk
+            return
+        if start >= stop:
+            return  # empty file can't be mapped
+        offset = self.file.tell()
+        mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for position in range(start, stop, self.chunk_size):
+                position += offset
+                yield mapped[position:min(position + self.chunk_size,
+                                          stop + offset)]
+        finally:
+            mapped.close()
+
+
+class StaticFiles(FileResponse):
+    """Response serving files of the :attr:`root` directory.
+
+    Should be mounted with 'path' param, e.g.::
+
+        Route('/static/{path:path}', StaticFiles, params=dict(root='/srv'))
+
+    Files not bigger than :attr:`max_cached_size` are kept in :attr:`cache`
+    until their mtime or size is changed, bigger ones are passed to the
+    server's 'wsgi.file_wrapper'. If client accepts gzip and file has
+    precompressed '.gz' sibling, the latter is sent.
+    """
+
+    root = None  # directory of files, may be overridden by 'root' param
+
+    cache = LRUCache(size=256)
+
+    max_cached_size = 64 * 1024
+
+    precompressed = True  # whether to look for '.gz' siblings
+
+    def get(self, path, root=None):
+        file_path = self.get_file_path(root or self.root, path)
+        content_type = mimetypes.guess_type(file_path, strict=False)[0]
+        self.headers['Content-Type'] = (
+            content_type or self.default_content_type)
+        if self.precompressed:
+            self.headers['Vary'] = 'Accept-Encoding'
+            if self.get_content_encoding(('gzip', )):
+                try:
+                    result = self.get_file(file_path + '.gz')
+                except http.Error:
+                    pass
+                else:
+                    self.headers['Content-Encoding'] = 'gzip'
+                    return result
+        return self.get_file(file_path)
+
+    head = get
+
+    def make_body(self, result):
+        if isinstance(result, bytes):  # content of the cached file
+            return Response.make_body(self, result)
+        return super(StaticFiles, self).make_body(result)
+
+    @staticmethod
+    def get_file_path(root, path):
+        if root is None:
+            raise ValueError('root directory is not set')
+        parts = path.replace('\\', '/').split('/')
+        if '..' in parts or '\0' in path:
+            raise http.Error('404 Not Found')
+        return os.path.join(root, *[part for part in parts if part])
+
+    def get_file(self, file_path):
+        try:
+            file_stat = os.stat(file_path)
+        except (IOError, OSError):
+            raise http.Error('404 Not Found')
+        if not stat.S_ISREG(file_stat.st_mode):
+            raise http.Error('404 Not Found')
+        mtime = getattr(file_stat, 'st_mtime_ns', None)  # Python 3.3+
+        if mtime is None:
+            mtime = int(file_stat.st_mtime * 1000000000)
+        if not self.is_modified(
+            etag='{0:x}-{1:x}-{2:x}'.format(
+                file_stat.st_ino, mtime, file_stat.st_size),
+            last_modified=file_stat.st_mtime,
+        ):
+            return None
+        if file_stat.st_size > self.max_cached_size:
+            return self.open(file_path)
+        key = file_path, mtime, file_stat.st_size
+        data = self.cache.get(key)
+        if data is None:
+            with self.open(file_path) as file:
+                data = file.read()
+            self.cache[key] = data
+        return data
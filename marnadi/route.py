@@ -1,4 +1,8 @@
+import heapq
+import os
 import re
+import string
+import uuid
 
 from marnadi.utils import ReferenceType, metaclass, Lazy
 
@@ -6,9 +10,26 @@ from marnadi.utils import ReferenceType, metaclass, Lazy
 class Route(object):
 
     __slots__ = 'path', 'handler', 'params', 'pattern', 'name', 'callbacks', \
-                'routes'
+                'routes', 'prefix', 'template'
 
-    placeholder_re = re.compile(r'\{([a-zA-Z_][a-zA-Z0-9_]*)\}')
+    # matches escaped braces as well as placeholders, e.g. "{id:int}"
+    placeholder_re = re.compile(
+        r'\{\{|\}\}|\{([a-zA-Z_][a-zA-Z0-9_]*)(?::([a-zA-Z_][a-zA-Z0-9_]*))?\}'
+    )
+
+    default_pattern = r'\w+'
+
+    # converter name -> (pattern, callback)
+    converters = {
+        'int': (r'\d+', int),
+        'str': (r'[^/]+', None),
+        'path': (r'.+', None),
+        'uuid': (
+            r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+            r'[0-9a-fA-F]{4}-[0-9a-fA-F]{12}',
+            uuid.UUID,
+        ),
+    }
 
     def __init__(self, path, handler=None, routes=(), name=None, params=None,
                  callbacks=None, patterns=None):
@@ -17,8 +38,10 @@ class Route(object):
         self.routes = Routes(routes)
         self.name = name
         self.params = params or {}
-        self.callbacks = callbacks or {}
+        self.callbacks = dict(callbacks or {})
         self.pattern = self.make_pattern(patterns)
+        self.prefix = self.make_prefix()
+        self.template = self.make_template()
 
     def __call__(self, *args, **kwargs):
         return self.handler(*args, **kwargs)
@@ -27,41 +50,257 @@ class Route(object):
         if self.pattern:
             match = self.pattern.match(path)
             if match:
-                params = dict(
-                    (param, self.callbacks.get(param, lambda x: x)(value))
-                    for param, value in match.groupdict().items()
-                )
-                return path[match.end(0):], dict(self.params, **params)
+                return path[match.end(0):], self.make_params(match.groupdict())
         elif path.startswith(self.path):
             return path[len(self.path):], self.params
 
+    def make_params(self, values):
+        params = dict(self.params, **values)
+        for param, callback in self.callbacks.items():
+            if param in values:
+                params[param] = callback(values[param])
+        return params
+
     def make_pattern(self, patterns=None):
-        unescaped_path = self.path.replace('{{', '').replace('}}', '')
-        placeholders = self.placeholder_re.findall(unescaped_path)
-        if not placeholders:
-            return
         patterns = patterns or {}
-        pattern = re.escape(self.path.replace('{{', '{').replace('}}', '}'))
-        for placeholder in placeholders:
-            pattern = pattern.replace(
-                r'\{{{placeholder}\}}'.format(placeholder=placeholder),
-                r'(?P<{name}>{pattern})'.format(
-                    name=placeholder,
-                    pattern=patterns.get(placeholder, r'\w+')
-                ),
-            )
-        return re.compile(pattern)
+        pattern = []
+        position = 0
+        has_placeholders = False
+        for match in self.placeholder_re.finditer(self.path):
+            pattern.append(re.escape(self.path[position:match.start()]))
+            position = match.end()
+            placeholder, converter = match.groups()
+            if placeholder is None:  # escaped brace
+                pattern.append(re.escape(match.group()[0]))
+                continue
+            has_placeholders = True
+            placeholder_pattern = self.default_pattern
+            if converter:
+                try:
+                    placeholder_pattern, callback = self.converters[converter]
+                except KeyError:
+                    raise ValueError(
+                        "Unknown converter '{converter}' of '{path}'".format(
+                            converter=converter,
+                            path=self.path,
+                        )
+                    )
+                if callback is not None:
+                    self.callbacks.setdefault(placeholder, callback)
+            pattern.append(r'(?P<{name}>{pattern})'.format(
+                name=placeholder,
+                pattern=patterns.get(placeholder, placeholder_pattern),
+            ))
+        if not has_placeholders:
+            return
+        pattern.append(re.escape(self.path[position:]))
+        return re.compile(''.join(pattern))
+
+    def make_prefix(self):
+        """Return static part of the path every matching path starts with."""
+        if not self.pattern:
+            return self.path
+        return re.split(r'[{}]', self.path, 1)[0]
+
+    def make_template(self):
+        """Return path as format string without placeholders converters."""
+        return self.placeholder_re.sub(
+            lambda match: match.group(1) and '{%s}' % match.group(1) or
+            match.group(),
+            self.path,
+        )
 
     def restore_path(self, **params):
-        return self.path.format(**params)
+        return self.template.format(**params)
+
+
+class RoutePath(object):
+    """Path of the named route precompiled from the chain of its parents.
+
+    Args:
+        routes (iterable): route with all its parents, outermost first.
+    """
+
+    __slots__ = 'template', 'params', 'path'
+
+    def __init__(self, routes):
+        self.template = ''.join(route.template for route in routes)
+        params = []
+        for _, field, _, _ in string.Formatter().parse(self.template):
+            param = field and re.split(r'[.\[]', field, 1)[0]
+            if param and param not in params:
+                params.append(param)
+        self.params = tuple(params)
+        self.path = None if params else self.template.format()
+
+    def __call__(self, *args, **params):
+        if self.path is not None:
+            return self.path  # route without params
+        if args:
+            params = dict(zip(self.params, args), **params)
+        try:
+            return self.template.format(**params)
+        except KeyError:
+            missing = [param for param in self.params if param not in params]
+            if not missing:
+                raise
+            raise ValueError(
+                "Missing params of path '{path}': {params}".format(
+                    path=self.template,
+                    params=', '.join(missing),
+                )
+            )
+
+
+class RoutesTree(object):
+    """Radix tree of routes' static prefixes.
+
+    Every node keeps indexes of the routes which prefix ends at it, so
+    lookup returns only routes which can match the path, ordered in
+    the same way as they were declared.
+    """
+
+    __slots__ = 'edges', 'indexes', 'size'
+
+    def __init__(self, routes=(), static=False):
+        self.edges = {}
+        self.indexes = []
+        self.size = len(routes)
+        for index, route in enumerate(routes):
+            if not (static and route.pattern):
+                self.insert(route.prefix, index)
+
+    def insert(self, prefix, index):
+        node = self
+        while prefix:
+            try:
+                label, child = node.edges[prefix[0]]
+            except KeyError:
+                node.edges[prefix[0]] = prefix, RoutesTree()
+                node = node.edges[prefix[0]][1]
+                break
+            common = len(os.path.commonprefix((label, prefix)))
+            if common < len(label):
+                middle = RoutesTree()
+                middle.edges[label[common]] = label[common:], child
+                node.edges[prefix[0]] = label[:common], middle
+                child = middle
+            node, prefix = child, prefix[common:]
+        node.indexes.append(index)
+
+    def lookup(self, path):
+        indexes = list(self.indexes)
+        node, position = self, 0
+        while position < len(path):
+            try:
+                label, node = node.edges[path[position]]
+            except KeyError:
+                break
+            if not path.startswith(label, position):
+                break
+            position += len(label)
+            indexes.extend(node.indexes)
+        indexes.sort()
+        return indexes
+
+
+class RoutesPattern(object):
+    """Alternation of routes' regular expressions.
+
+    Finds the first matching route among all routes with placeholders
+    using single `re.match` call. Params groups are renamed to make them
+    unique across the alternation.
+    """
+
+    __slots__ = 'chunks',
+
+    max_groups = 99  # Python < 3.5 doesn't support more than 100 groups
+
+    group_re = re.compile(r'\(\?P(<|=)([a-zA-Z_][a-zA-Z0-9_]*)')
+
+    def __init__(self, routes=()):
+        self.chunks = []
+        alternatives, chunk_routes, groups_count = [], [], 0
+        for index, route in enumerate(routes):
+            if not route.pattern:
+                continue
+            groups = len(route.pattern.groupindex) + 1
+            if chunk_routes and groups_count + groups > self.max_groups:
+                self.add_chunk(alternatives, chunk_routes)
+                alternatives, chunk_routes, groups_count = [], [], 0
+            name = 'r{0}'.format(index)
+            alternatives.append('(?P<{name}>{pattern})'.format(
+                name=name,
+                pattern=self.group_re.sub(
+                    r'(?P\1{0}_\2'.format(name),
+                    route.pattern.pattern,
+                ),
+            ))
+            chunk_routes.append((index, route, name, tuple(
+                (param, '{0}_{1}'.format(name, param))
+                for param in route.pattern.groupindex
+            )))
+            groups_count += groups
+        if chunk_routes:
+            self.add_chunk(alternatives, chunk_routes)
+
+    def add_chunk(self, alternatives, chunk_routes):
+        self.chunks.append((
+            re.compile('|'.join(alternatives)),
+            dict(
+                (name, position)
+                for position, (_, _, name, _) in enumerate(chunk_routes)
+            ),
+            chunk_routes,
+        ))
+
+    def match(self, path):
+        """Yield `(index, rest_path, params)` for every matching route."""
+        for pattern, positions, chunk_routes in self.chunks:
+            match = pattern.match(path)
+            if not match:
+                continue
+            position = positions[match.lastgroup]
+            index, route, _, groups = chunk_routes[position]
+            yield index, path[match.end(0):], route.make_params(dict(
+                (param, match.group(group)) for param, group in groups
+            ))
+            # backtracking: rest of the chunk is checked route by route
+            for index, route, _, _ in chunk_routes[position + 1:]:
+                route_match = route.match(path)
+                if route_match:
+                    rest_path, params = route_match
+                    yield index, rest_path, params
+
+
+def invalidating(method):
+    """Wrap list method to reset compiled routes after the call."""
+    def mutator(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.reset()
+        return result
+    mutator.__name__ = method.__name__
+    mutator.__doc__ = method.__doc__
+    return mutator
 
 
 @metaclass(ReferenceType)
 class Routes(list):
+    """Sequence of routes.
+
+    Args:
+        seq (iterable): routes, lazy routes or nested sequences of routes.
+        combined (bool): whether routes with placeholders should be matched
+            using single combined regular expression instead of trying
+            them one by one, useful when there are a lot of them on the
+            same level.
+    """
+
+    __slots__ = 'combined', '_tree', '_pattern'
 
-    __slots__ = ()
+    revision = 0  # changes every time routes are added or recompiled
 
-    def __init__(self, seq=()):
+    def __init__(self, seq=(), combined=False):
         def unnest(routes):
             for route in map(Lazy, routes):
                 if isinstance(route, Route):
@@ -70,6 +309,59 @@ class Routes(list):
                     for unnested in unnest(route):
                         yield unnested
         super(Routes, self).__init__(unnest(seq))
+        self.combined = combined
+        self._tree = self._pattern = None
+
+    __setitem__ = invalidating(list.__setitem__)
+    __delitem__ = invalidating(list.__delitem__)
+    __iadd__ = invalidating(list.__iadd__)
+    __imul__ = invalidating(list.__imul__)
+    append = invalidating(list.append)
+    extend = invalidating(list.extend)
+    insert = invalidating(list.insert)
+    pop = invalidating(list.pop)
+    remove = invalidating(list.remove)
+    reverse = invalidating(list.reverse)
+    sort = invalidating(list.sort)
+
+    if hasattr(list, '__setslice__'):  # Python 2
+        __setslice__ = invalidating(list.__setslice__)
+        __delslice__ = invalidating(list.__delslice__)
+
+    def reset(self):
+        """Drop compiled routes, they are rebuilt on the next match."""
+        self._tree = self._pattern = None
+        Routes.revision += 1
+
+    def compile(self):
+        """Build radix tree used to find routes matching the path.
+
+        Tree is rebuilt automatically after routes are changed by any
+        of the list methods.
+        """
+        if self.combined:
+            self._pattern = RoutesPattern(self)
+        tree = self._tree = RoutesTree(self, static=self.combined)
+        Routes.revision += 1
+        return tree
+
+    def match(self, path):
+        """Yield `(route, rest_path, params)` for every matching route."""
+        tree = self._tree
+        if tree is None or tree.size != len(self):
+            tree = self.compile()
+        matches = self.match_indexes(path, tree.lookup(path))
+        if self.combined:
+            matches = heapq.merge(matches, self._pattern.match(path))
+        for index, rest_path, params in matches:
+            yield self[index], rest_path, params
+
+    def match_indexes(self, path, indexes):
+        for index in indexes:
+            match = self[index].match(path)
+            if match:
+                rest_path, params = match
+                yield index, rest_path, params
 
     def route(self, path, **route_params):
         def _decorator(handler):
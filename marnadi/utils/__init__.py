@@ -64,8 +64,28 @@ def coroutine(fn):
     return _fn
 
 
+class ClosingIterator(object):
+    """Iterator calling `close` callback when it's closed by the server."""
+
+    __slots__ = 'iterator', 'close'
+
+    def __init__(self, iterable, close):
+        self.iterator = iter(iterable)
+        self.close = close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.iterator)
+
+    def next(self):
+        return self.__next__()
+
+
 def import_module(path):
     module = path.rpartition('.')[2]
     return __import__(path, fromlist=(module, ))
 
 from .lazy import Lazy, CachedDescriptor, cached_property
+from .cache import LRUCache
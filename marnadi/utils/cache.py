@@ -0,0 +1,76 @@
+import threading
+
+
+class LRUCache(object):
+    """Size bounded mapping discarding least recently used items.
+
+    Args:
+        size (int): max number of items to keep.
+    """
+
+    __slots__ = 'size', 'hits', 'misses', 'lock', '_items', '_root'
+
+    PREV, NEXT, KEY, VALUE = range(4)
+
+    def __init__(self, size=128):
+        self.size = size
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+        self._items = {}
+        self._root = root = []  # circular doubly linked list of items
+        root[:] = [root, root, None, None]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __getitem__(self, key):
+        default = []
+        value = self.get(key, default)
+        if value is default:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        PREV, NEXT, VALUE = self.PREV, self.NEXT, self.VALUE
+        with self.lock:
+            root = self._root
+            link = self._items.get(key)
+            if link is not None:
+                link[VALUE] = value
+                self._move_to_end(link)
+                return
+            if len(self._items) >= self.size:
+                oldest = root[NEXT]
+                root[NEXT] = oldest[NEXT]
+                oldest[NEXT][PREV] = root
+                del self._items[oldest[self.KEY]]
+            last = root[PREV]
+            last[NEXT] = root[PREV] = self._items[key] = [
+                last, root, key, value]
+
+    def get(self, key, default=None):
+        with self.lock:
+            link = self._items.get(key)
+            if link is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._move_to_end(link)
+            return link[self.VALUE]
+
+    def clear(self):
+        with self.lock:
+            self._items.clear()
+            root = self._root
+            root[:] = [root, root, None, None]
+
+    def _move_to_end(self, link):
+        PREV, NEXT = self.PREV, self.NEXT
+        root = self._root
+        link[PREV][NEXT], link[NEXT][PREV] = link[NEXT], link[PREV]
+        last = root[PREV]
+        last[NEXT] = root[PREV] = link
+        link[PREV], link[NEXT] = last, root
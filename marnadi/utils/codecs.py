@@ -0,0 +1,144 @@
+import sys
+
+try:
+    import json
+except ImportError:  # pragma: no cover
+    json = None
+
+
+class JSONCodec(object):
+    """JSON codec, `loads` accepts bytes, `dumps` returns UTF-8 bytes.
+
+    Args:
+        name (str): name of the backend module.
+        loads (callable): decodes object from bytes.
+        dumps (callable): encodes object to bytes.
+    """
+
+    __slots__ = 'name', 'loads', 'dumps'
+
+    def __init__(self, name, loads, dumps):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self):
+        return '<{cls} {name}>'.format(
+            cls=self.__class__.__name__,
+            name=self.name,
+        )
+
+
+def _encode(data):
+    # Python 2 backends return native str if all strings are native
+    if isinstance(data, bytes):
+        return data
+    return data.encode('utf-8')
+
+
+def _orjson():
+    import orjson
+    return JSONCodec('orjson', loads=orjson.loads, dumps=orjson.dumps)
+
+
+def _ujson():
+    import ujson
+    return JSONCodec(
+        'ujson',
+        loads=ujson.loads,
+        dumps=lambda obj: _encode(ujson.dumps(obj, ensure_ascii=False)),
+    )
+
+
+def _rapidjson():
+    import rapidjson
+    return JSONCodec(
+        'rapidjson',
+        loads=rapidjson.loads,
+        dumps=lambda obj: _encode(rapidjson.dumps(obj, ensure_ascii=False)),
+    )
+
+
+def _json():
+    if json is None:
+        raise ImportError('json')
+    if sys.version_info >= (3, 6):
+        loads = json.loads
+    else:
+        def loads(data):
+            if isinstance(data, bytes):
+                data = data.decode('utf-8')
+            return json.loads(data)
+    return JSONCodec(
+        'json',
+        loads=loads,
+        dumps=lambda obj: _encode(json.dumps(
+            obj, ensure_ascii=False, separators=(',', ':'))),
+    )
+
+
+json_codecs = [
+    ('orjson', _orjson),
+    ('ujson', _ujson),
+    ('rapidjson', _rapidjson),
+    ('json', _json),
+]
+"""Registered JSON codecs factories in order of preference."""
+
+
+def register_json_codec(name, factory, preferred=True):
+    """Register JSON codec factory.
+
+    Args:
+        name (str): name of the codec.
+        factory (callable): returns :class:`JSONCodec`, must raise
+            ImportError if backend is not available.
+        preferred (bool): whether codec should be preferred over
+            already registered ones.
+    """
+    json_codecs.insert(0 if preferred else len(json_codecs), (name, factory))
+    set_default_json_codec(None)  # resolve it again at the next use
+
+
+def get_json_codec(*names):
+    """Return first importable JSON codec.
+
+    Args:
+        names (str): names of acceptable codecs in order of preference,
+            all registered codecs are tried if omitted.
+    """
+    factories = dict(json_codecs)
+    for name in names or [name for name, factory in json_codecs]:
+        try:
+            return factories[name]()
+        except ImportError:
+            continue
+    raise ImportError('no JSON codec available: {names}'.format(
+        names=', '.join(names),
+    ))
+
+
+_default_json_codec = None
+
+
+def get_default_json_codec():
+    """Return JSON codec used by default.
+
+    It's the first importable registered codec unless set explicitly
+    by :func:`set_default_json_codec`.
+    """
+    global _default_json_codec
+    if _default_json_codec is None:
+        _default_json_codec = get_json_codec()
+    return _default_json_codec
+
+
+def set_default_json_codec(codec):
+    """Set JSON codec used by default.
+
+    Args:
+        codec (JSONCodec): codec, `None` resets the default to the first
+            importable registered codec.
+    """
+    global _default_json_codec
+    _default_json_codec = codec
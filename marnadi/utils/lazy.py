@@ -4,26 +4,48 @@ from marnadi.utils import metaclass, import_module
 
 
 class CachedDescriptor(object):
+    """Descriptor caching its value per instance.
 
-    __slots__ = 'cache',
+    Values are kept in the instance's `__dict__` when owner class has one
+    (e.g. includes '__dict__' to its `__slots__`), otherwise in the weak
+    key dictionary of the descriptor which requires instance to support
+    weak references.
+    """
+
+    __slots__ = 'cache', 'key'
 
     def __init__(self):
         self.cache = weakref.WeakKeyDictionary()
+        self.key = '__cached_{0:x}'.format(id(self))
+
+    def __set_name__(self, owner, name):
+        self.key = name
 
     def __get__(self, instance, instance_type=None):
         if instance is None:
             return self  # static access
+        if type(instance).__dictoffset__:
+            cache, key = instance.__dict__, self.key
+        else:
+            cache, key = self.cache, instance
         try:
-            return self.cache[instance]
+            return cache[key]
         except KeyError:
-            value = self.cache[instance] = self.get_value(instance)
+            value = cache[key] = self.get_value(instance)
             return value
 
     def __set__(self, instance, value):
-        self.cache[instance] = self.set_value(instance, value)
+        value = self.set_value(instance, value)
+        if type(instance).__dictoffset__:
+            instance.__dict__[self.key] = value
+        else:
+            self.cache[instance] = value
 
     def __delete__(self, instance):
-        del self.cache[instance]
+        if type(instance).__dictoffset__:
+            del instance.__dict__[self.key]
+        else:
+            del self.cache[instance]
 
     def get_value(self, instance):
         raise NotImplementedError
@@ -70,6 +92,20 @@ class LazyMeta(type):
             return path
         return super(LazyMeta, cls).__call__(path)
 
+    # methods below are accessible only through the class, e.g.
+    # `Lazy.resolve(obj)`, and don't shadow attributes of lazy objects
+
+    def resolve(cls, obj):
+        """Return object referenced by lazy one, other objects as is."""
+        if isinstance(obj, cls):
+            return obj._Lazy__obj
+        return obj
+
+    def get_path(cls, obj):
+        """Return import path of lazy object or None for other objects."""
+        if isinstance(obj, cls):
+            return obj._Lazy__path
+
 
 @metaclass(LazyMeta)
 class Lazy(object):
@@ -117,5 +153,14 @@ class Lazy(object):
             path, attribute = attribute, path
         module = import_module(path)
         if attribute:
-            return getattr(module, attribute)
+            try:
+                return getattr(module, attribute)
+            except AttributeError:
+                # AttributeError here would be swallowed by __getattr__
+                raise ImportError(
+                    'cannot import name {name} from {path}'.format(
+                        name=attribute,
+                        path=path,
+                    )
+                )
         return module
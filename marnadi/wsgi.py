@@ -1,14 +1,12 @@
 import collections
 import functools
 import itertools
-try:
-    from urllib import parse
-except ImportError:
-    import urlparse as parse
+import logging
+import time
 
 from marnadi import http
-from marnadi.route import Routes
-from marnadi.utils import cached_property
+from marnadi.route import Routes, RoutePath
+from marnadi.utils import cached_property, Lazy, LRUCache
 
 
 class Request(collections.Mapping):
@@ -19,7 +17,7 @@ class Request(collections.Mapping):
     """
 
     if hasattr(collections.Mapping, '__slots__'):
-        __slots__ = 'environ', '__weakref__'
+        __slots__ = 'environ', '__weakref__', '__dict__'
 
     __hash__ = object.__hash__
 
@@ -27,6 +25,12 @@ class Request(collections.Mapping):
 
     __ne__ = object.__ne__
 
+    chunk_size = 64 * 1024  # default size of the body chunks
+
+    max_body_size = None  # max size of the body in bytes, unlimited if None
+
+    max_stream_size = 16 * 1024 * 1024  # max size of the body without length
+
     def __init__(self, environ):
         self.environ = environ
 
@@ -65,7 +69,66 @@ class Request(collections.Mapping):
 
     @property
     def content_length(self):
-        return int(self.get('CONTENT_LENGTH', 0))
+        """Value of the 'Content-Length' header.
+
+        Raises "413 Request Entity Too Large" if it exceeds
+        :attr:`max_body_size`.
+        """
+        try:
+            content_length = int(self.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            raise http.Error('400 Bad Request')
+        if content_length < 0:
+            raise http.Error('400 Bad Request')
+        if (
+            self.max_body_size is not None and
+            content_length > self.max_body_size
+        ):
+            raise http.Error('413 Request Entity Too Large')
+        return content_length
+
+    @property
+    def input_terminated(self):
+        """Whether input can be read until its end regardless of length.
+
+        Usually means server supports chunked transfer encoding.
+        """
+        return bool(self.get('wsgi.input_terminated'))
+
+    def stream(self, chunk_size=None):
+        """Iterate over the request body by chunks.
+
+        Reads no more than 'Content-Length' bytes. Body without length is
+        read until its end when server marks input as terminated, see
+        :attr:`input_terminated`, but no more than :attr:`max_stream_size`
+        and :attr:`max_body_size` bytes, "413 Request Entity Too Large"
+        is raised otherwise.
+
+        Args:
+            chunk_size (int): max size of chunks, :attr:`chunk_size`
+                by default.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        read = self.input.read
+        if not self.get('CONTENT_LENGTH') and self.input_terminated:
+            total, max_size = 0, self.max_stream_size
+            if self.max_body_size is not None:
+                max_size = min(max_size, self.max_body_size)
+            while True:
+                chunk = read(chunk_size)
+                if not chunk:
+                    return
+                total += len(chunk)
+                if total > max_size:
+                    raise http.Error('413 Request Entity Too Large')
+                yield chunk
+        remaining = self.content_length
+        while remaining > 0:
+            chunk = read(min(remaining, chunk_size))
+            if not chunk:
+                return  # client disconnected
+            remaining -= len(chunk)
+            yield chunk
 
     @cached_property
     def content_type(self):
@@ -80,43 +143,28 @@ class Request(collections.Mapping):
 
     @cached_property
     def headers(self):
-        return dict(
-            (name.title().replace('_', '-'), value)
-            for name, value in
-            itertools.chain(
-                (
-                    (env_key, self[env_key])
-                    for env_key in ('CONTENT_TYPE', 'CONTENT_LENGTH')
-                    if env_key in self
-                ),
-                (
-                    (env_key[5:], env_value)
-                    for env_key, env_value in self.items()
-                    if env_key.startswith('HTTP_')
-                ),
-            )
-        )
+        return http.RequestHeaders(self.environ)
 
-    @cached_property
-    def query(self):
-        try:
-            return dict(parse.parse_qsl(
-                self.query_string,
-                keep_blank_values=True,
-            ))
-        except KeyError:
-            return {}
+    query = http.Query()
 
     data = http.Data(
         (
             'application/json',
             'marnadi.http.data.decoders.application.json.Decoder',
         ),
+        (
+            'application/x-ndjson',
+            'marnadi.http.data.decoders.application.x_ndjson.Decoder',
+        ),
         (
             'application/x-www-form-urlencoded',
             'marnadi.http.data.decoders' +
             '.application.x_www_form_urlencoded.Decoder',
         ),
+        (
+            'multipart/form-data',
+            'marnadi.http.data.decoders.multipart.form_data.Decoder',
+        ),
     )
 
 
@@ -128,34 +176,100 @@ class App(object):
 
     Args:
         routes (iterable): list of :class:`Route`.
+        cache_size (int): max number of paths which handlers are kept
+            in LRU cache, caching is disabled by default.
+        cache_not_found (bool): whether paths without handler should be
+            cached too.
+        preload (bool): whether all lazy handlers and data decoders should
+            be imported immediately, see :meth:`warmup`.
+        max_body_size (int): max size of requests body in bytes, can be
+            overridden by :attr:`Response.max_body_size`.
+        compression (bool): whether responses should be compressed,
+            can be overridden by :attr:`Response.compression`.
     """
 
-    __slots__ = 'routes', 'route_map'
+    __slots__ = 'routes', 'route_map', 'route_paths', 'cache', \
+                'cache_not_found', 'cache_revision', 'max_body_size', \
+                'compression'
+
+    logger = logging.getLogger('marnadi')
 
-    def __init__(self, routes=()):
+    request_type = Request
+
+    def __init__(self, routes=(), cache_size=0, cache_not_found=False,
+                 preload=False, max_body_size=None, compression=False):
+        self.max_body_size = max_body_size
+        self.compression = compression
         self.route_map = {}
+        self.route_paths = {}
         self.routes = Routes(routes)
         self.build_route_map()
+        self.cache = LRUCache(size=cache_size) if cache_size else None
+        self.cache_not_found = cache_not_found
+        self.cache_revision = Routes.revision
+        if preload:
+            self.warmup()
 
     def __call__(self, environ, start_response):
         try:
             request = self.make_request_object(environ)
             handler = self.get_handler(request.path)
             response = handler(self, request)
+            body = getattr(response, 'body', response)
         except http.Error as error:
-            response = error
+            response = body = error
         start_response(
             response.status,
             list(response.headers.items(stringify=True))
         )
-        return response
+        return body
+
+    def make_request_object(self, environ):
+        request = self.request_type(environ)
+        if self.max_body_size is not None:
+            request.max_body_size = self.max_body_size
+        return request
+
+    def warmup(self):
+        """Import all lazy handlers and request data decoders.
+
+        Allows to avoid import delays during first requests. Import errors
+        are raised immediately.
 
-    @staticmethod
-    def make_request_object(environ):
-        return Request(environ)  # TODO make request_type as instance attribute
+        Returns:
+            dict: import time in seconds of every lazy object by its path.
+        """
+        timings = {}
+        for lazy in itertools.chain(
+            self.get_lazy_handlers(self.routes),
+            self.get_lazy_decoders(),
+        ):
+            path = Lazy.get_path(lazy)
+            started = time.time()
+            Lazy.resolve(lazy)
+            timings[path] = timings.get(path, 0) + time.time() - started
+        for path, seconds in sorted(timings.items()):
+            self.logger.info('%s loaded in %.2f ms', path, seconds * 1000)
+        return timings
+
+    def get_lazy_handlers(self, routes):
+        for route in routes:
+            if Lazy.get_path(route.handler) is not None:
+                yield route.handler
+            for handler in self.get_lazy_handlers(route.routes):
+                yield handler
+
+    def get_lazy_decoders(self):
+        for cls in self.request_type.__mro__:
+            for value in vars(cls).values():
+                if isinstance(value, http.Data):
+                    for decoder in value.values():
+                        if Lazy.get_path(decoder) is not None:
+                            yield decoder
 
     def build_route_map(self, routes=None, parents=()):
         routes = self.routes if routes is None else routes
+        routes.compile()
         for route in routes:
             self.register_route(route, parents=parents)
 
@@ -163,17 +277,20 @@ class App(object):
         parents = parents + (route, )
         if route.name:
             self.route_map[route.name] = parents
+            self.route_paths[route.name] = RoutePath(parents)
         self.build_route_map(route.routes, parents=parents)
 
     def route(self, path, **route_params):
         return self.routes.route(path, **route_params)
 
-    def make_path(self, *route_name, **params):
-        assert len(route_name) == 1
-        return ''.join(
-            route.restore_path(**params)
-            for route in self.route_map[route_name[0]]
-        )
+    def make_path(self, *args, **params):
+        """Return path of the named route.
+
+        First positional argument is the route name, the rest ones are
+        route params in the order they appear in the path.
+        """
+        assert len(args) >= 1
+        return self.route_paths[args[0]](*args[1:], **params)
 
     def get_handler(self, path, routes=None, params=None):
         """Return handler according to the given path.
@@ -184,24 +301,48 @@ class App(object):
             override this method by raising `http.Error` with 301 status and
             necessary 'Location' header when needed.
         """
-        routes = routes or self.routes
+        if self.cache is None or routes is not None or params is not None:
+            handler = self.find_handler(path, routes=routes, params=params)
+        else:
+            handler = self.find_cached_handler(path)
+        if handler is None:
+            raise http.Error('404 Not Found')  # matching route not found
+        return handler
+
+    def find_cached_handler(self, path):
+        """Same as :meth:`find_handler` but uses cache of found handlers.
+
+        Cache is cleared every time routes are added at runtime.
+        """
+        cache = self.cache
+        if self.cache_revision != Routes.revision:
+            cache.clear()
+            self.cache_revision = Routes.revision
+        handler = cache.get(path, cache)
+        if handler is cache:  # cache miss
+            handler = self.find_handler(path)
+            if handler is not None or self.cache_not_found:
+                cache[path] = handler
+        return handler
+
+    def find_handler(self, path, routes=None, params=None):
+        """Return handler according to the given path or None if not found.
+
+        Unlike :meth:`get_handler` doesn't raise any errors, so wrong ways
+        cost nothing more than unsuccessful match.
+        """
+        routes = self.routes if routes is None else routes
         params = params or {}
-        for route in routes:
-            match = route.match(path)
-            if not match:
-                continue
-            rest_path, route_params = match
+        for route, rest_path, route_params in routes.match(path):
             if not rest_path:
                 if route.handler:
                     params.update(route_params)
                     return functools.partial(route.handler.start, **params)
-            else:
-                try:
-                    return self.get_handler(
-                        rest_path,
-                        routes=route.routes,
-                        params=dict(params, **route_params),
-                    )
-                except http.Error:
-                    pass  # wrong way raises "404 Not Found" at the end
-        raise http.Error('404 Not Found')  # matching route not found
+            elif route.routes:
+                handler = self.find_handler(
+                    rest_path,
+                    routes=route.routes,
+                    params=dict(params, **route_params),
+                )
+                if handler is not None:
+                    return handler
@@ -14,6 +14,7 @@ setup(
         'marnadi.http.data',
         'marnadi.http.data.decoders',
         'marnadi.http.data.decoders.application',
+        'marnadi.http.data.decoders.multipart',
         'marnadi.utils',
     ],
     url='https://github.com/renskiy/marnadi',
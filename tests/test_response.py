@@ -1,10 +1,19 @@
+import datetime
 import io
+import json
+import os
+import shutil
+import tempfile
+import wsgiref.util
+import zlib
 try:
     import unittest2 as unittest
 except ImportError:
     import unittest
 
-from marnadi import Response, Route
+from marnadi import Response, JSONResponse, FileResponse, StaticFiles, \
+    Route, http
+from marnadi.utils import LRUCache, codecs
 from marnadi.wsgi import Request, App
 
 handler_function = Response.get(lambda: 'foo')
@@ -13,6 +22,54 @@ handler_class = type('MyHandler', (Response, ), dict(
     get=lambda *args: 'hello'
 ))
 
+handler_post = type('MyPostHandler', (Response, ), dict(
+    post=lambda this: b''.join(this.request.stream()),
+))
+
+
+def handle_request(handler, method='GET', path='/', route='/', params=None,
+                   app_kwargs=None, **environ):
+    """Make request to the App with the only route to the handler.
+
+    Returns:
+        tuple: status, dict of headers and list of body chunks, body
+            is closed after reading.
+    """
+    result = {}
+
+    def start_response(status, headers):
+        result.update(status=status, headers=dict(headers))
+
+    app = App(
+        routes=[Route(route, handler, params=params)],
+        **(app_kwargs or {})
+    )
+    environ.update(REQUEST_METHOD=method, PATH_INFO=path)
+    body = app(environ, start_response)
+    try:
+        chunks = list(body)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return result['status'], result['headers'], chunks
+
+
+class TemporaryFileMixin(object):
+    """Creates temporary '.txt' file with :attr:`file_content` modified
+    at 2001-09-09 01:46:40 UTC for every test.
+    """
+
+    file_content = b''
+
+    def setUp(self):
+        self.file = tempfile.NamedTemporaryFile(suffix='.txt', delete=False)
+        self.file.write(self.file_content)
+        self.file.close()
+        os.utime(self.file.name, (1000000000, 1000000000))
+
+    def tearDown(self):
+        os.remove(self.file.name)
+
 
 class ResponseTestCase(unittest.TestCase):
 
@@ -53,6 +110,18 @@ class ResponseTestCase(unittest.TestCase):
             ),
         )
 
+    def test_simple_body_is_list(self):
+        app = App(routes=(Route('/', handler_class), ))
+        environ = Request(dict(REQUEST_METHOD='GET', PATH_INFO='/'))
+        self.assertListEqual([b'hello'], app(environ, lambda *args: None))
+
+    def test_response_is_iterator(self):
+        app = App(routes=(Route('/', handler_class), ))
+        request = Request(dict(REQUEST_METHOD='GET', PATH_INFO='/'))
+        response = handler_class.start(app, request)
+        self.assertEqual(b'hello', next(response))
+        self.assertListEqual([], list(response))
+
     def test_as_class(self):
         routes = (
             Route('/', handler_class),
@@ -259,3 +328,1146 @@ class ResponseTestCase(unittest.TestCase):
                 ('Content-Length', '15'),
             ),
         )
+
+
+class HttpMethodsTestCase(unittest.TestCase):
+
+    def test_class_handler(self):
+        self.assertSetEqual(
+            set(Response.supported_http_methods),
+            set(handler_class.http_methods),
+        )
+        self.assertIsNotNone(handler_class.http_methods['GET'])
+        self.assertIsNone(handler_class.http_methods['POST'])
+        self.assertSetEqual(
+            set(['OPTIONS', 'GET']),
+            set(handler_class.allow_header.split(', ')),
+        )
+
+    def test_function_handler(self):
+        response = handler_function.__response__
+        self.assertIsNotNone(response.http_methods['GET'])
+        self.assertSetEqual(
+            set(['OPTIONS', 'GET']),
+            set(response.allow_header.split(', ')),
+        )
+
+    def test_function_handler_extra_method(self):
+        handler = Response.post(Response.get(lambda: 'foo'))
+        self.assertSetEqual(
+            set(['OPTIONS', 'GET', 'POST']),
+            set(handler.__response__.allow_header.split(', ')),
+        )
+
+    def test_updated_on_setattr(self):
+        handler = type('MyHandler', (Response, ), {})
+        self.assertEqual('OPTIONS', handler.allow_header)
+        handler.put = lambda *args: 'hello'
+        self.assertIsNotNone(handler.http_methods['PUT'])
+        self.assertSetEqual(
+            set(['OPTIONS', 'PUT']),
+            set(handler.allow_header.split(', ')),
+        )
+
+    def test_subclasses_updated_on_setattr(self):
+        handler = type('MyHandler', (Response, ), {})
+        subhandler = type('MySubHandler', (handler, ), {})
+        handler.post = lambda *args: 'hello'
+        self.assertIsNotNone(subhandler.http_methods['POST'])
+        self.assertSetEqual(
+            set(['OPTIONS', 'POST']),
+            set(subhandler.allow_header.split(', ')),
+        )
+        del handler.post
+        self.assertIsNone(subhandler.http_methods['POST'])
+        self.assertEqual('OPTIONS', subhandler.allow_header)
+        status, headers, chunks = handle_request(subhandler, 'POST')
+        self.assertEqual('405 Method Not Allowed', status)
+
+    def test_options(self):
+        routes = (
+            Route('/', handler_class),
+        )
+        environ = Request(dict(
+            REQUEST_METHOD='OPTIONS',
+            PATH_INFO='/',
+        ))
+        app = App(routes=routes)
+        headers = []
+        b''.join(app(environ, lambda status, response_headers: headers.extend(
+            response_headers)))
+        self.assertSetEqual(
+            set(['OPTIONS', 'GET']),
+            set(dict(headers)['Allow'].split(', ')),
+        )
+
+
+class MaxBodySizeTestCase(unittest.TestCase):
+
+    class _Input(io.BytesIO):
+
+        def read(self, *args):
+            raise AssertionError("body must not be read")
+
+    def _request(self, app, content_length, method='POST'):
+        statuses = []
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': '/',
+            'wsgi.input': self._Input(),
+            'CONTENT_LENGTH': content_length,
+        }
+        b''.join(app(environ, lambda status, headers: statuses.append(status)))
+        return statuses[0]
+
+    def test_app_limit(self):
+        app = App([Route('/', handler_post)], max_body_size=10)
+        self.assertEqual(
+            '413 Request Entity Too Large',
+            self._request(app, '11'),
+        )
+
+    def test_app_limit_not_exceeded(self):
+        app = App([Route('/', handler_post)], max_body_size=10)
+        self.assertEqual('200 OK', self._request(app, '0'))
+
+    def test_response_limit(self):
+        handler = type('', (handler_post, ), dict(max_body_size=5))
+        app = App([Route('/', handler)], max_body_size=10)
+        self.assertEqual(
+            '413 Request Entity Too Large',
+            self._request(app, '6'),
+        )
+
+    def test_response_limit_overrides_app_limit(self):
+        handler = type('', (handler_post, ), dict(max_body_size=20))
+        app = App([Route('/', handler)], max_body_size=10)
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': '/',
+            'wsgi.input': io.BytesIO(b'a' * 15),
+            'CONTENT_LENGTH': '15',
+        }
+        result = b''.join(app(environ, lambda status, headers: None))
+        self.assertEqual(b'a' * 15, result)
+
+    def test_invalid_content_length(self):
+        app = App([Route('/', handler_post)], max_body_size=10)
+        self.assertEqual('400 Bad Request', self._request(app, 'foo'))
+        self.assertEqual('400 Bad Request', self._request(app, '-1'))
+
+    def test_unknown_length_limit(self):
+        request = Request({
+            'wsgi.input': io.BytesIO(b'a' * 11),
+            'wsgi.input_terminated': True,
+        })
+        request.max_body_size = 10
+        with self.assertRaises(http.Error) as context:
+            list(request.stream(chunk_size=4))
+        self.assertEqual(
+            '413 Request Entity Too Large',
+            context.exception.status,
+        )
+
+
+baz = b'\xd0\xb1\xd0\xb0\xd0\xb7'.decode('utf-8')
+
+
+class MultipartFormDataTestCase(unittest.TestCase):
+
+    body = (
+        b'preamble\r\n'
+        b'--boundary\r\n'
+        b'Content-Disposition: form-data; name="foo"\r\n'
+        b'\r\n'
+        b'bar\r\n'
+        b'--boundary\r\n'
+        b'Content-Disposition: form-data; name="file"; filename="a.txt"\r\n'
+        b'Content-Type: text/plain\r\n'
+        b'\r\n'
+        b'hello\r\nworld\r\n\r\n'
+        b'--boundary\r\n'
+        b'Content-Disposition: form-data; name="foo"\r\n'
+        b'\r\n'
+        b'\xd0\xb1\xd0\xb0\xd0\xb7\r\n'
+        b'--boundary--\r\n'
+        b'epilogue'
+    )
+
+    def _request(self, body=None, boundary='boundary', chunk_size=None):
+        body = self.body if body is None else body
+        request = Request({
+            'wsgi.input': io.BytesIO(body),
+            'CONTENT_LENGTH': str(len(body)),
+            'CONTENT_TYPE': 'multipart/form-data; boundary=%s' % boundary,
+        })
+        if chunk_size is not None:
+            request.chunk_size = chunk_size
+        return request
+
+    def test_decode(self):
+        data = self._request().data
+        self.assertEqual(baz, data['foo'])
+        self.assertListEqual(['bar', baz],
+                             data.getall('foo'))
+        self.assertEqual('a.txt', data['file'].filename)
+        self.assertEqual('text/plain', data['file'].content_type[0])
+        self.assertEqual(b'hello\r\nworld\r\n', data['file'].read())
+        self.assertEqual(14, data['file'].size)
+
+    def test_decode_by_small_chunks(self):
+        from marnadi.http.data.decoders.multipart import form_data
+        for chunk_size in range(1, 20):
+            decoder = type('', (form_data.Decoder, ), dict(
+                chunk_size=chunk_size,
+            ))
+            data = decoder(self._request())
+            self.assertListEqual(['bar', baz],
+                                 data.getall('foo'))
+            self.assertEqual(b'hello\r\nworld\r\n', data['file'].read())
+
+    def test_decode_quoted_boundary(self):
+        data = self._request(boundary='"boundary"').data
+        self.assertEqual('a.txt', data['file'].filename)
+
+    def test_large_file_spilled_to_disk(self):
+        from marnadi.http.data.decoders.multipart import form_data
+        decoder = type('', (form_data.Decoder, ), dict(memory_size=10))
+        data = decoder(self._request(
+            self.body.replace(b'hello', b'hello' * 10),
+        ))
+        self.assertTrue(data['file'].file._rolled)
+        self.assertEqual(b'hello' * 10 + b'\r\nworld\r\n', data['file'].read())
+        data['file'].close()
+
+    def test_size_limits(self):
+        from marnadi.http.data.decoders.multipart import form_data
+        for limits in (
+            dict(max_part_size=13),
+            dict(max_field_size=2),
+            dict(max_size=20),
+        ):
+            decoder = type('', (form_data.Decoder, ), limits)
+            with self.assertRaises(http.Error) as context:
+                decoder(self._request())
+            self.assertEqual(
+                '413 Request Entity Too Large',
+                context.exception.status,
+            )
+
+    def test_broken_body(self):
+        for body in (
+            b'',
+            self.body[:-30],
+            b'--boundary\r\n\r\nfoo\r\n--boundary--',
+        ):
+            with self.assertRaises(http.Error) as context:
+                self._request(body).data
+            self.assertEqual('400 Bad Request', context.exception.status)
+
+    def test_too_long_delimiter_line(self):
+        from marnadi.http.data.decoders.multipart import form_data
+        decoder = type('', (form_data.Decoder, ), dict(
+            chunk_size=10,
+            max_headers_size=100,
+        ))
+        body = b'--boundary' + b' ' * 1000 + b'\r\n'
+        with self.assertRaises(http.Error) as context:
+            decoder(self._request(body))
+        self.assertEqual('400 Bad Request', context.exception.status)
+        body = self.body.replace(b'--boundary\r\n', b'--boundary  \r\n')
+        data = decoder(self._request(body))
+        self.assertListEqual(['bar', baz], data.getall('foo'))
+
+    def test_no_boundary(self):
+        request = self._request()
+        request.environ['CONTENT_TYPE'] = 'multipart/form-data'
+        with self.assertRaises(http.Error) as context:
+            request.data
+        self.assertEqual('400 Bad Request', context.exception.status)
+
+
+class JSONDecoderTestCase(unittest.TestCase):
+
+    def test_decode_charset(self):
+        body = b'{"foo": "bar"}'.decode('ascii').encode('utf-16')
+        for content_type, body in (
+            ('application/json', b'{"foo": "bar"}'),
+            ('application/json; charset=UTF8', b'{"foo": "bar"}'),
+            ('application/json; charset=utf-16', body),
+        ):
+            request = Request({
+                'wsgi.input': io.BytesIO(body),
+                'CONTENT_LENGTH': str(len(body)),
+                'CONTENT_TYPE': content_type,
+            })
+            self.assertDictEqual({'foo': 'bar'}, request.data)
+
+
+class JSONCodecRegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.json_codecs = list(codecs.json_codecs)
+        self.calls = calls = []
+        json_codec = codecs.get_json_codec('json')
+
+        def factory():
+            def loads(data):
+                calls.append('loads')
+                return json_codec.loads(data)
+
+            def dumps(obj):
+                calls.append('dumps')
+                return json_codec.dumps(obj)
+
+            return codecs.JSONCodec('custom', loads=loads, dumps=dumps)
+
+        codecs.register_json_codec('custom', factory)
+
+    def tearDown(self):
+        codecs.json_codecs[:] = self.json_codecs
+        codecs.set_default_json_codec(None)
+
+    def test_registered_codec_is_used(self):
+        request = Request({
+            'wsgi.input': io.BytesIO(b'{"foo": "bar"}'),
+            'CONTENT_LENGTH': '14',
+            'CONTENT_TYPE': 'application/json',
+        })
+        self.assertDictEqual({'foo': 'bar'}, request.data)
+        request = Request({
+            'wsgi.input': io.BytesIO(b'1\n2'),
+            'CONTENT_LENGTH': '3',
+            'CONTENT_TYPE': 'application/x-ndjson',
+        })
+        self.assertListEqual([1, 2], list(request.data))
+        app = App(routes=[Route('/', JSONResponse.get(lambda: [1]))])
+        environ = dict(REQUEST_METHOD='GET', PATH_INFO='/')
+        self.assertListEqual([b'[1]'], app(environ, lambda *args: None))
+        self.assertListEqual(['loads'] * 3 + ['dumps'], self.calls)
+
+
+class NDJSONTestCase(unittest.TestCase):
+
+    body = b'{"foo": 1}\n\n["bar"]\r\n"\xd0\xb1\xd0\xb0\xd0\xb7"'
+
+    def _request(self, body=None):
+        body = self.body if body is None else body
+        return Request({
+            'wsgi.input': io.BytesIO(body),
+            'CONTENT_LENGTH': str(len(body)),
+            'CONTENT_TYPE': 'application/x-ndjson',
+        })
+
+    def test_decode(self):
+        from marnadi.http.data.decoders.application import x_ndjson
+        expected = [{'foo': 1}, ['bar'], baz]
+        for chunk_size in range(1, len(self.body) + 1):
+            decoder = type('', (x_ndjson.Decoder, ), dict(
+                chunk_size=chunk_size,
+            ))
+            self.assertListEqual(expected, list(decoder(self._request())))
+        self.assertListEqual(expected, list(self._request().data))
+
+    def test_decode_lazily(self):
+        request = self._request(b'1\n2\n"broken\n3')
+        records = request.data
+        self.assertEqual(1, next(records))
+        self.assertEqual(2, next(records))
+        with self.assertRaises(http.Error) as context:
+            next(records)
+        self.assertEqual('400 Bad Request', context.exception.status)
+
+    def test_too_long_line(self):
+        from marnadi.http.data.decoders.application import x_ndjson
+        decoder = type('', (x_ndjson.Decoder, ), dict(
+            chunk_size=2,
+            max_line_size=5,
+        ))
+        records = decoder(self._request(b'1\n"foobar"\n2'))
+        self.assertEqual(1, next(records))
+        with self.assertRaises(http.Error) as context:
+            next(records)
+        self.assertEqual(
+            '413 Request Entity Too Large',
+            context.exception.status,
+        )
+
+
+class ContentEncodingTestCase(unittest.TestCase):
+
+    @staticmethod
+    def _request(body, content_encoding,
+                 content_type='application/json'):
+        return Request({
+            'wsgi.input': io.BytesIO(body),
+            'CONTENT_LENGTH': str(len(body)),
+            'CONTENT_TYPE': content_type,
+            'HTTP_CONTENT_ENCODING': content_encoding,
+        })
+
+    @staticmethod
+    def _compress(data, wbits):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, wbits)
+        return compressor.compress(data) + compressor.flush()
+
+    def test_decompress(self):
+        data = b'{"hello": "world"}'
+        gzip, deflate = 16 + zlib.MAX_WBITS, zlib.MAX_WBITS
+        for content_encoding, body in (
+            ('identity', data),
+            ('gzip', self._compress(data, gzip)),
+            ('x-gzip', self._compress(data, gzip)),
+            ('deflate', self._compress(data, deflate)),
+            ('Deflate, gzip', self._compress(
+                self._compress(data, deflate), gzip)),
+        ):
+            request = self._request(body, content_encoding)
+            self.assertDictEqual({'hello': 'world'}, request.data)
+
+    def test_decompress_ndjson_by_small_chunks(self):
+        from marnadi.http.data.decoders.application import x_ndjson
+        decoder = type('', (x_ndjson.Decoder, ), dict(chunk_size=3))
+        body = self._compress(b'1\n2\n3\n' * 100, 16 + zlib.MAX_WBITS)
+        request = self._request(body, 'gzip', 'application/x-ndjson')
+        self.assertListEqual([1, 2, 3] * 100, list(decoder(request)))
+
+    def test_unsupported_encoding(self):
+        request = self._request(b'{}', 'br')
+        with self.assertRaises(http.Error) as context:
+            request.data
+        self.assertEqual(
+            '415 Unsupported Media Type',
+            context.exception.status,
+        )
+
+    def test_broken_body(self):
+        body = self._compress(b'{"hello": "world"}', 16 + zlib.MAX_WBITS)
+        for broken_body in (b'not gzip', body[:-10]):
+            request = self._request(broken_body, 'gzip')
+            with self.assertRaises(http.Error) as context:
+                request.data
+            self.assertEqual('400 Bad Request', context.exception.status)
+
+    def test_decompression_bomb(self):
+        from marnadi.http.data.decoders.application import json
+        body = self._compress(b'0' * 1024 * 1024, zlib.MAX_WBITS)
+        for limits in (
+            dict(max_decompressed_size=1000, max_compression_ratio=None),
+            dict(max_decompressed_size=None, max_compression_ratio=100),
+        ):
+            decoder = type('', (json.Decoder, ), limits)
+            with self.assertRaises(http.Error) as context:
+                decoder(self._request(body, 'deflate'))
+            self.assertEqual(
+                '413 Request Entity Too Large',
+                context.exception.status,
+            )
+
+
+class JSONResponseTestCase(unittest.TestCase):
+
+    def test_small_payload(self):
+        for payload in ({'foo': [1, 'bar']}, [1, 2], 'foo', 1, True):
+            handler = JSONResponse.get(lambda: payload)
+            status, headers, chunks = handle_request(handler)
+            self.assertEqual('200 OK', status)
+            self.assertEqual('application/json', headers['Content-Type'])
+            self.assertEqual(1, len(chunks))
+            self.assertEqual(str(len(chunks[0])), headers['Content-Length'])
+            self.assertEqual(payload, json.loads(chunks[0].decode()))
+
+    def test_none(self):
+        status, headers, chunks = handle_request(
+            JSONResponse.get(lambda: None))
+        self.assertEqual([b''], chunks)
+        self.assertEqual('0', headers['Content-Length'])
+        status, headers, chunks = handle_request(JSONResponse, 'OPTIONS')
+        self.assertEqual([b''], chunks)
+
+    def test_stream(self):
+        handler = type('', (JSONResponse, ), dict(
+            get=lambda this: (dict(id=index) for index in range(100)),
+            chunk_size=100,
+        ))
+        status, headers, chunks = handle_request(handler)
+        self.assertNotIn('Content-Length', headers)
+        self.assertGreater(len(chunks), 5)
+        self.assertListEqual(
+            [dict(id=index) for index in range(100)],
+            json.loads(b''.join(chunks).decode()),
+        )
+
+    def test_stream_large_list(self):
+        items = list(range(20))
+        for threshold, chunk_size in ((10, 10), (10, 1000), (20, 1)):
+            handler = type('', (JSONResponse, ), dict(
+                get=lambda this: items,
+                streaming_threshold=threshold,
+                chunk_size=chunk_size,
+            ))
+            status, headers, chunks = handle_request(handler)
+            self.assertListEqual(
+                items, json.loads(b''.join(chunks).decode()))
+
+    def test_stream_empty(self):
+        status, headers, chunks = handle_request(
+            JSONResponse.get(lambda: iter(())))
+        self.assertEqual(b'[]', b''.join(chunks))
+
+
+class BufferingTestCase(unittest.TestCase):
+
+    @staticmethod
+    def _chunks(handler):
+        status, headers, chunks = handle_request(handler)
+        return chunks
+
+    def test_no_buffering(self):
+        handler = Response.get(lambda: iter(['a', Response.FLUSH, 'b', 'c']))
+        self.assertListEqual([b'a', b'b', b'c'], self._chunks(handler))
+
+    def test_buffering(self):
+        handler = type('', (Response, ), dict(
+            get=lambda this: (str(index) for index in range(10)),
+            buffer_size=3,
+        ))
+        self.assertListEqual(
+            [b'0', b'123', b'456', b'789'],
+            self._chunks(handler),
+        )
+
+    def test_flush(self):
+        handler = type('', (Response, ), dict(
+            get=lambda this: iter([
+                Response.FLUSH, 'a', 'b', Response.FLUSH, Response.FLUSH,
+                'c', 'd', 'efg', 'h',
+            ]),
+            buffer_size=3,
+        ))
+        self.assertListEqual(
+            [b'', b'ab', b'cdefg', b'h'],
+            self._chunks(handler),
+        )
+
+
+class CompressionTestCase(unittest.TestCase):
+
+    body = b'hello, world! ' * 100
+
+    @staticmethod
+    def _request(handler, accept_encoding='gzip', **app_kwargs):
+        environ = {}
+        if accept_encoding is not None:
+            environ['HTTP_ACCEPT_ENCODING'] = accept_encoding
+        status, headers, chunks = handle_request(
+            handler, app_kwargs=app_kwargs, **environ)
+        return headers, chunks
+
+    def _handler(self, **attrs):
+        body = self.body
+        attrs.setdefault('get', lambda this: body)
+        attrs.setdefault('compression', True)
+        return type('', (Response, ), attrs)
+
+    def test_compress_simple_body(self):
+        headers, chunks = self._request(self._handler())
+        self.assertEqual(1, len(chunks))
+        self.assertEqual('gzip', headers['Content-Encoding'])
+        self.assertEqual('Accept-Encoding', headers['Vary'])
+        self.assertEqual(str(len(chunks[0])), headers['Content-Length'])
+        self.assertEqual(
+            self.body,
+            zlib.decompress(chunks[0], 16 + zlib.MAX_WBITS),
+        )
+
+    def test_compress_stream(self):
+        body = self.body
+        handler = self._handler(get=lambda this: (body for _ in range(10)))
+        headers, chunks = self._request(handler, 'deflate')
+        self.assertEqual('deflate', headers['Content-Encoding'])
+        self.assertNotIn('Content-Length', headers)
+        self.assertGreater(len(chunks), 10)
+        decompressor = zlib.decompressobj()
+        for chunk in chunks[:-1]:
+            # every chunk can be decompressed as soon as it's received
+            self.assertEqual(body, decompressor.decompress(chunk))
+        self.assertEqual(b'', decompressor.decompress(chunks[-1]))
+        self.assertEqual(b'', decompressor.unused_data)
+
+    def test_accept_encoding(self):
+        for accept_encoding, expected_encoding in (
+            ('gzip', 'gzip'),
+            ('deflate', 'deflate'),
+            ('gzip, deflate', 'gzip'),
+            ('gzip;q=0.5, deflate', 'deflate'),
+            ('gzip; q=0.5, deflate; q=0.8', 'deflate'),
+            ('*', 'gzip'),
+            ('*;q=0.5, gzip;q=0', 'deflate'),
+            ('gzip;q=0, deflate;q=0', None),
+            ('gzip;q=foo', None),
+            ('br', None),
+            ('identity', None),
+            ('', None),
+            (None, None),
+        ):
+            headers, chunks = self._request(self._handler(), accept_encoding)
+            self.assertEqual(
+                expected_encoding,
+                headers.get('Content-Encoding'),
+                accept_encoding,
+            )
+            self.assertEqual('Accept-Encoding', headers['Vary'])
+            if expected_encoding is None:
+                self.assertListEqual([self.body], chunks)
+
+    def test_skip(self):
+        for handler, expected_body in (
+            (self._handler(compression=None), self.body),
+            (self._handler(compression=False), self.body),
+            (self._handler(get=lambda this: b'small'), b'small'),
+            (self._handler(headers=http.Headers(
+                ('Content-Type', 'image/png'),
+            )), self.body),
+            (self._handler(headers=http.Headers(
+                ('Content-Encoding', 'br'),
+            )), self.body),
+        ):
+            headers, chunks = self._request(handler)
+            self.assertNotIn('Vary', headers)
+            self.assertListEqual([expected_body], chunks)
+
+    def test_app_compression(self):
+        headers, chunks = self._request(
+            self._handler(compression=None),
+            compression=True,
+        )
+        self.assertEqual('gzip', headers['Content-Encoding'])
+        headers, chunks = self._request(
+            self._handler(compression=False),
+            compression=True,
+        )
+        self.assertNotIn('Content-Encoding', headers)
+
+    def test_vary_extended(self):
+        handler = self._handler(headers=http.Headers(
+            ('Vary', 'Cookie'),
+        ))
+        headers, chunks = self._request(handler)
+        self.assertEqual('Cookie, Accept-Encoding', headers['Vary'])
+        self.assertEqual('Cookie', handler.headers['Vary'][0])
+        for vary in ('Cookie, accept-encoding', '*'):
+            handler = self._handler(headers=http.Headers(('Vary', vary)))
+            headers, chunks = self._request(handler)
+            self.assertEqual('gzip', headers['Content-Encoding'])
+            self.assertEqual(vary, headers['Vary'])
+
+
+class ConditionalRequestTestCase(unittest.TestCase):
+
+    def test_auto_etag(self):
+        handler = type('', (Response, ), dict(
+            get=lambda this: 'hello',
+            post=lambda this: 'hello',
+            etag=True,
+        ))
+        status, headers, chunks = handle_request(handler)
+        etag = headers['Etag']
+        self.assertEqual('"aaf4c61ddcc5e8a2dabede0f3b482cd9aea9434d"', etag)
+        for if_none_match in (etag, 'W/' + etag, '"foo", ' + etag, '*'):
+            status, headers, chunks = handle_request(
+                handler, HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual('304 Not Modified', status)
+            self.assertEqual([], chunks)
+            self.assertEqual(etag, headers['Etag'])
+            self.assertNotIn('Content-Length', headers)
+            self.assertNotIn('Content-Type', headers)
+        status, headers, chunks = handle_request(
+            handler, HTTP_IF_NONE_MATCH='"foo"')
+        self.assertEqual('200 OK', status)
+        self.assertEqual([b'hello'], chunks)
+        status, headers, chunks = handle_request(
+            handler, 'POST', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual('200 OK', status)
+
+    def test_not_modified_compressed(self):
+        handler = type('', (Response, ), dict(
+            get=lambda this: 'hello',
+            etag=True,
+            compression_min_size=0,
+        ))
+        app_kwargs = dict(compression=True)
+        status, headers, chunks = handle_request(
+            handler, app_kwargs=app_kwargs, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual('200 OK', status)
+        self.assertEqual('gzip', headers['Content-Encoding'])
+        etag = headers['Etag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual('Accept-Encoding', headers['Vary'])
+        status, headers, chunks = handle_request(
+            handler,
+            app_kwargs=app_kwargs,
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual('304 Not Modified', status)
+        self.assertEqual([], chunks)
+        self.assertEqual(etag, headers['Etag'])
+        self.assertEqual('Accept-Encoding', headers['Vary'])
+        self.assertNotIn('Content-Encoding', headers)
+
+    def test_no_auto_etag(self):
+        for body in ('hello', iter(['hello'])):
+            handler = Response.get(lambda: body)
+            status, headers, chunks = handle_request(handler)
+            self.assertNotIn('Etag', headers)
+
+    def test_short_circuit(self):
+        calls = []
+
+        def get(this):
+            if not this.is_modified(etag='v1', last_modified=1000000000):
+                return None
+            calls.append(True)
+            return 'hello'
+
+        handler = type('', (Response, ), dict(get=get))
+        status, headers, chunks = handle_request(handler)
+        self.assertEqual('200 OK', status)
+        self.assertEqual('"v1"', headers['Etag'])
+        self.assertEqual(
+            'Sun, 09 Sep 2001 01:46:40 GMT',
+            headers['Last-Modified'],
+        )
+        for environ in (
+            dict(HTTP_IF_NONE_MATCH='"v1"'),
+            dict(HTTP_IF_MODIFIED_SINCE='Sun, 09 Sep 2001 01:46:40 GMT'),
+            dict(HTTP_IF_MODIFIED_SINCE='Mon, 10 Sep 2001 00:00:00 GMT'),
+        ):
+            status, headers, chunks = handle_request(handler, **environ)
+            self.assertEqual('304 Not Modified', status)
+            self.assertEqual([], chunks)
+        self.assertEqual(1, len(calls))
+        for environ in (
+            dict(HTTP_IF_NONE_MATCH='"v2"'),
+            dict(
+                HTTP_IF_NONE_MATCH='"v2"',
+                HTTP_IF_MODIFIED_SINCE='Mon, 10 Sep 2001 00:00:00 GMT',
+            ),
+            dict(HTTP_IF_MODIFIED_SINCE='Sat, 08 Sep 2001 00:00:00 GMT'),
+            dict(HTTP_IF_MODIFIED_SINCE='foo'),
+        ):
+            status, headers, chunks = handle_request(handler, **environ)
+            self.assertEqual('200 OK', status)
+            self.assertEqual([b'hello'], chunks)
+
+    def test_last_modified_datetime(self):
+        handler = type('', (Response, ), dict(
+            get=lambda this: this.is_modified(
+                last_modified=datetime.datetime(2001, 9, 9, 1, 46, 40),
+            ) and 'hello' or None,
+        ))
+        status, headers, chunks = handle_request(handler)
+        self.assertEqual(
+            'Sun, 09 Sep 2001 01:46:40 GMT',
+            headers['Last-Modified'],
+        )
+
+    def test_compressed_etag_is_weak(self):
+        handler = type('', (Response, ), dict(
+            get=lambda this: 'hello' * 1000,
+            etag=True,
+            compression=True,
+        ))
+        status, headers, chunks = handle_request(
+            handler, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(headers['Etag'].startswith('W/"'))
+        status, headers, chunks = handle_request(
+            handler,
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=headers['Etag'],
+        )
+        self.assertEqual('304 Not Modified', status)
+        self.assertNotIn('Content-Encoding', headers)
+
+
+class FileResponseTestCase(TemporaryFileMixin, unittest.TestCase):
+
+    file_content = b'hello, world!'
+
+    def test_file_wrapper(self):
+        path = self.file.name
+        handler = FileResponse.get(lambda: open(path, 'rb'))
+        wrappers = []
+
+        class file_wrapper(wsgiref.util.FileWrapper):
+
+            def __init__(self, *args):
+                wrappers.append(self)
+                wsgiref.util.FileWrapper.__init__(self, *args)
+
+        status, headers, chunks = handle_request(
+            handler,
+            **{'wsgi.file_wrapper': file_wrapper}
+        )
+        self.assertEqual(1, len(wrappers))
+        self.assertEqual(b'hello, world!', b''.join(chunks))
+        self.assertEqual('13', headers['Content-Length'])
+        self.assertEqual('text/plain', headers['Content-Type'])
+        self.assertEqual(
+            'Sun, 09 Sep 2001 01:46:40 GMT',
+            headers['Last-Modified'],
+        )
+
+    def test_fallback(self):
+        path = self.file.name
+
+        def get():
+            file = open(path, 'rb')
+            file.seek(7)
+            return file
+
+        status, headers, chunks = handle_request(FileResponse.get(get))
+        self.assertEqual(b'world!', b''.join(chunks))
+        self.assertEqual('6', headers['Content-Length'])
+
+    def test_path(self):
+        path = self.file.name
+        handler = type('', (FileResponse, ), dict(
+            get=lambda this: path,
+            chunk_size=5,
+        ))
+        status, headers, chunks = handle_request(handler)
+        self.assertListEqual([b'hello', b', wor', b'ld!'], chunks)
+        status, headers, chunks = handle_request(
+            FileResponse.get(lambda: path + '.missing'))
+        self.assertEqual('404 Not Found', status)
+
+    def test_content_type_set_by_handler(self):
+        path = self.file.name
+
+        def get(this):
+            this.headers['Content-Type'] = 'text/csv'
+            return path
+
+        status, headers, chunks = handle_request(
+            type('', (FileResponse, ), dict(get=get)))
+        self.assertEqual('text/csv', headers['Content-Type'])
+        self.assertEqual(b'hello, world!', b''.join(chunks))
+
+    def test_not_modified(self):
+        files = []
+
+        def get():
+            files.append(open(self.file.name, 'rb'))
+            return files[-1]
+
+        status, headers, chunks = handle_request(
+            FileResponse.get(get),
+            HTTP_IF_MODIFIED_SINCE='Sun, 09 Sep 2001 01:46:40 GMT',
+        )
+        self.assertEqual('304 Not Modified', status)
+        self.assertEqual([], chunks)
+        self.assertTrue(files[0].closed)
+
+    def test_compressed(self):
+        files = []
+
+        def get(this):
+            files.append(open(self.file.name, 'rb'))
+            return files[-1]
+
+        status, headers, chunks = handle_request(
+            type('', (FileResponse, ), dict(
+                get=get,
+                compression=True,
+                compression_min_size=0,
+            )),
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual('gzip', headers['Content-Encoding'])
+        self.assertEqual(
+            b'hello, world!',
+            zlib.decompress(b''.join(chunks), 16 + zlib.MAX_WBITS),
+        )
+        self.assertTrue(files[0].closed)
+
+
+class RangeTestCase(TemporaryFileMixin, unittest.TestCase):
+
+    body = file_content = b'0123456789' * 10
+
+    def _request(self, handler, **environ):
+        status, headers, chunks = handle_request(handler, **environ)
+        data = b''.join(chunks)
+        if 'Content-Length' in headers:
+            self.assertEqual(str(len(data)), headers['Content-Length'])
+        return status, headers, data
+
+    def _handlers(self, chunk_size=7):
+        body, path = self.body, self.file.name
+        return (
+            type('', (Response, ), dict(
+                get=lambda this: body,
+                accept_ranges=True,
+            )),
+            type('', (FileResponse, ), dict(
+                get=lambda this: path,
+                chunk_size=chunk_size,
+            )),
+        )
+
+    def test_single_range(self):
+        for handler in self._handlers():
+            for range_header, expected_range, expected_data in (
+                ('bytes=0-9', '0-9', self.body[:10]),
+                ('bytes=5-', '5-99', self.body[5:]),
+                ('bytes=-5', '95-99', self.body[-5:]),
+                ('bytes=-500', '0-99', self.body),
+                ('bytes=90-200', '90-99', self.body[90:]),
+                ('bytes=1-1', '1-1', b'1'),
+                ('bytes=100-, 3-4', '3-4', b'34'),
+            ):
+                status, headers, data = self._request(
+                    handler, HTTP_RANGE=range_header)
+                self.assertEqual('206 Partial Content', status)
+                self.assertEqual(
+                    'bytes {0}/100'.format(expected_range),
+                    headers['Content-Range'],
+                )
+                self.assertEqual(expected_data, data)
+                self.assertEqual('bytes', headers['Accept-Ranges'])
+
+    def test_multiple_ranges(self):
+        for handler in self._handlers():
+            status, headers, data = self._request(
+                handler, HTTP_RANGE='bytes=0-1, 15-24, -3')
+            self.assertEqual('206 Partial Content', status)
+            content_type = headers['Content-Type']
+            self.assertTrue(content_type.startswith(
+                'multipart/byteranges; boundary='))
+            boundary = content_type.split('=', 1)[1].encode()
+            parts = data.split(b'--' + boundary)
+            self.assertEqual(b'', parts[0])
+            self.assertEqual(b'--\r\n', parts[-1])
+            self.assertEqual(
+                [(b'0-1', b'01'), (b'15-24', b'5678901234'),
+                 (b'97-99', b'789')],
+                [
+                    (
+                        part.split(b'Content-Range: bytes ')[1].split(
+                            b'/')[0],
+                        part.split(b'\r\n\r\n', 1)[1][:-2],
+                    )
+                    for part in parts[1:-1]
+                ],
+            )
+            self.assertIn(b'Content-Type: text/plain', parts[1])
+
+    def test_unsatisfiable(self):
+        for handler in self._handlers():
+            for range_header in ('bytes=100-', 'bytes=-0', 'bytes=200-300'):
+                status, headers, data = self._request(
+                    handler, HTTP_RANGE=range_header)
+                self.assertEqual(
+                    '416 Requested Range Not Satisfiable', status)
+                self.assertEqual('bytes */100', headers['Content-Range'])
+
+    def test_zero_length(self):
+        self.body = b''
+        open(self.file.name, 'wb').close()
+        for handler in self._handlers():
+            for range_header in ('bytes=-5', 'bytes=0-', 'bytes=0-0, -1'):
+                status, headers, data = self._request(
+                    handler, HTTP_RANGE=range_header)
+                self.assertEqual(
+                    '416 Requested Range Not Satisfiable', status)
+                self.assertEqual('bytes */0', headers['Content-Range'])
+            status, headers, data = self._request(handler)
+            self.assertEqual('200 OK', status)
+            self.assertEqual(b'', data)
+
+    def test_ignored_range(self):
+        for handler in self._handlers():
+            for range_header in (
+                'items=0-1', 'bytes=5-1', 'bytes=a-b', 'bytes=-', 'bytes=1',
+                'bytes=' + ','.join(['0-1'] * 11),
+            ):
+                status, headers, data = self._request(
+                    handler, HTTP_RANGE=range_header)
+                self.assertEqual('200 OK', status, range_header)
+                self.assertEqual(self.body, data)
+
+    def test_if_range(self):
+        file_handler = self._handlers()[1]
+        for if_range, expected_status in (
+            ('Sun, 09 Sep 2001 01:46:40 GMT', '206 Partial Content'),
+            ('Sun, 09 Sep 2001 01:46:41 GMT', '200 OK'),
+            ('"foo"', '200 OK'),
+        ):
+            status, headers, data = self._request(
+                file_handler, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=if_range)
+            self.assertEqual(expected_status, status)
+        handler = type('', (Response, ), dict(
+            get=lambda this: 'hello',
+            accept_ranges=True,
+            etag=True,
+        ))
+        status, headers, data = self._request(handler)
+        etag = headers['Etag']
+        for if_range, expected_status in (
+            (etag, '206 Partial Content'),
+            ('W/' + etag, '200 OK'),
+            ('"foo"', '200 OK'),
+        ):
+            status, headers, data = self._request(
+                handler, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=if_range)
+            self.assertEqual(expected_status, status)
+
+    def test_no_ranges(self):
+        for handler in (
+            Response.get(lambda: 'hello'),
+            type('', (Response, ), dict(
+                get=lambda this: iter(['hello']),
+                accept_ranges=True,
+            )),
+        ):
+            status, headers, data = self._request(
+                handler, HTTP_RANGE='bytes=0-1')
+            self.assertEqual('200 OK', status)
+            self.assertNotIn('Accept-Ranges', headers)
+
+
+class StaticFilesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.root, 'css'))
+        self._write('css/style.css', b'body {}')
+        self._write('large.txt', b'x' * 100)
+        self._write('app.js', b'alert(1)')
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self._write(
+            'app.js.gz',
+            compressor.compress(b'alert(1)') + compressor.flush(),
+        )
+        self.handler = type('', (StaticFiles, ), dict(
+            cache=LRUCache(size=10),
+            max_cached_size=50,
+        ))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _write(self, path, data):
+        with open(os.path.join(self.root, path), 'wb') as file:
+            file.write(data)
+
+    def _request(self, path, **environ):
+        status, headers, chunks = handle_request(
+            self.handler,
+            path=path,
+            route='/static/{path:path}',
+            params=dict(root=self.root),
+            **environ
+        )
+        return status, headers, b''.join(chunks)
+
+    def test_cached_file(self):
+        status, headers, data = self._request('/static/css/style.css')
+        self.assertEqual('200 OK', status)
+        self.assertEqual(b'body {}', data)
+        self.assertEqual('text/css', headers['Content-Type'])
+        self.assertEqual('7', headers['Content-Length'])
+        self.assertIn('Last-Modified', headers)
+        self.assertEqual(1, len(self.handler.cache))
+        status, headers, data = self._request('/static/css/style.css')
+        self.assertEqual(b'body {}', data)
+        self.assertEqual(1, self.handler.cache.hits)
+        self._write('css/style.css', b'body {color: red}')
+        status, headers, data = self._request('/static/css/style.css')
+        self.assertEqual(b'body {color: red}', data)
+
+    def test_compressed(self):
+        self.handler.compression = True
+        self.handler.compression_min_size = 0
+        status, headers, data = self._request(
+            '/static/large.txt', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual('gzip', headers['Content-Encoding'])
+        self.assertEqual('Accept-Encoding', headers['Vary'])
+        self.assertEqual(
+            b'x' * 100,
+            zlib.decompress(data, 16 + zlib.MAX_WBITS),
+        )
+
+    def test_large_file(self):
+        status, headers, data = self._request(
+            '/static/large.txt',
+            **{'wsgi.file_wrapper': wsgiref.util.FileWrapper}
+        )
+        self.assertEqual(b'x' * 100, data)
+        self.assertEqual('100', headers['Content-Length'])
+        self.assertEqual(0, len(self.handler.cache))
+        status, headers, data = self._request(
+            '/static/large.txt', HTTP_RANGE='bytes=10-19')
+        self.assertEqual('206 Partial Content', status)
+        self.assertEqual(b'x' * 10, data)
+
+    def test_precompressed(self):
+        status, headers, data = self._request(
+            '/static/app.js', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual('gzip', headers['Content-Encoding'])
+        self.assertEqual('Accept-Encoding', headers['Vary'])
+        self.assertEqual(
+            b'alert(1)',
+            zlib.decompress(data, 16 + zlib.MAX_WBITS),
+        )
+        for accept_encoding in ('deflate', 'gzip;q=0'):
+            status, headers, data = self._request(
+                '/static/app.js', HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertNotIn('Content-Encoding', headers)
+            self.assertEqual(b'alert(1)', data)
+        status, headers, data = self._request(
+            '/static/css/style.css', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(b'body {}', data)
+
+    def test_not_modified(self):
+        status, headers, data = self._request('/static/css/style.css')
+        status, headers, data = self._request(
+            '/static/css/style.css',
+            HTTP_IF_NONE_MATCH=headers['Etag'],
+        )
+        self.assertEqual('304 Not Modified', status)
+        self.assertEqual(b'', data)
+
+    def test_modified_within_second(self):
+        path = os.path.join(self.root, 'css/style.css')
+        os.utime(path, (1000000000.25, 1000000000.25))
+        status, headers, data = self._request('/static/css/style.css')
+        etag = headers['Etag']
+        self._write('css/style.css', b'body{}!')
+        os.utime(path, (1000000000.5, 1000000000.5))
+        status, headers, data = self._request(
+            '/static/css/style.css',
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual('200 OK', status)
+        self.assertEqual(b'body{}!', data)
+        self.assertNotEqual(etag, headers['Etag'])
+
+    def test_not_found(self):
+        for path in (
+            '/static/missing.css',
+            '/static/css',
+            '/static/../' + os.path.basename(self.root) + '/app.js',
+            '/static/css/../../etc/passwd',
+            '/static/css\\..\\app.js',
+            '/static/app.js\0',
+        ):
+            status, headers, data = self._request(path)
+            self.assertEqual('404 Not Found', status, path)
+
+    def test_leading_slashes(self):
+        status, headers, data = self._request('/static//css//style.css')
+        self.assertEqual(b'body {}', data)
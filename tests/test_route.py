@@ -1,10 +1,71 @@
+import uuid
 try:
     import unittest2 as unittest
 except ImportError:
     import unittest
 
 from marnadi import Route
-from marnadi.route import Routes
+from marnadi.route import Routes, RoutesTree, RoutesPattern, RoutePath
+
+
+class RouteTestCase(unittest.TestCase):
+
+    def test_match_static(self):
+        route = Route('/foo', params=dict(foo='bar'))
+        self.assertTupleEqual(
+            ('/bar', dict(foo='bar')),
+            route.match('/foo/bar'),
+        )
+        self.assertIsNone(route.match('/bar'))
+
+    def test_match_escaped_braces(self):
+        route = Route('/{{foo}}/{bar}')
+        self.assertTupleEqual(('', dict(bar='baz')), route.match('/{foo}/baz'))
+        self.assertEqual('/{foo}/baz', route.restore_path(bar='baz'))
+
+    def test_match_callbacks(self):
+        route = Route('/{foo}', callbacks=dict(foo=int, bar=int))
+        self.assertTupleEqual(('', dict(foo=42)), route.match('/42'))
+
+    def test_converter_int(self):
+        route = Route('/{id:int}/')
+        self.assertTupleEqual(('', dict(id=42)), route.match('/42/'))
+        self.assertIsNone(route.match('/foo/'))
+        self.assertEqual('/42/', route.restore_path(id=42))
+
+    def test_converter_str(self):
+        route = Route('/{slug:str}/')
+        self.assertTupleEqual(
+            ('', dict(slug='foo-bar')),
+            route.match('/foo-bar/'),
+        )
+
+    def test_converter_path(self):
+        route = Route('/static/{path:path}')
+        self.assertTupleEqual(
+            ('', dict(path='css/main.css')),
+            route.match('/static/css/main.css'),
+        )
+
+    def test_converter_uuid(self):
+        uid = uuid.uuid4()
+        route = Route('/{uid:uuid}')
+        self.assertTupleEqual(('', dict(uid=uid)), route.match('/%s' % uid))
+        self.assertIsNone(route.match('/foo'))
+
+    def test_converter_overridden(self):
+        route = Route('/{id:int}', patterns=dict(id='[0-9a-f]+'),
+                      callbacks=dict(id=lambda value: int(value, 16)))
+        self.assertTupleEqual(('', dict(id=255)), route.match('/ff'))
+
+    def test_converter_unknown(self):
+        with self.assertRaises(ValueError):
+            Route('/{id:foo}')
+
+    def test_callbacks_are_copied(self):
+        callbacks = {}
+        Route('/{id:int}', callbacks=callbacks)
+        self.assertDictEqual({}, callbacks)
 
 
 class RoutesTestCase(unittest.TestCase):
@@ -37,3 +98,164 @@ class RoutesTestCase(unittest.TestCase):
         route = Route('/')
         routes = [route] * 2 + [[route] * 2] * 2
         self.assertListEqual([route] * 6, Routes(routes))
+
+
+class RoutesTreeTestCase(unittest.TestCase):
+
+    def test_lookup_empty(self):
+        tree = RoutesTree()
+        self.assertListEqual([], tree.lookup('/foo'))
+
+    def test_lookup_static(self):
+        tree = RoutesTree([Route('/foo'), Route('/bar'), Route('/foo/bar')])
+        self.assertListEqual([0, 2], tree.lookup('/foo/bar'))
+        self.assertListEqual([0], tree.lookup('/foo/baz'))
+        self.assertListEqual([1], tree.lookup('/bar'))
+        self.assertListEqual([], tree.lookup('/baz'))
+
+    def test_lookup_keeps_routes_order(self):
+        tree = RoutesTree([Route('/foo/bar'), Route('/'), Route('/foo')])
+        self.assertListEqual([0, 1, 2], tree.lookup('/foo/bar'))
+
+    def test_lookup_split_edge(self):
+        tree = RoutesTree([Route('/foobar'), Route('/foobaz'), Route('/fo')])
+        self.assertListEqual([1, 2], tree.lookup('/foobaz'))
+        self.assertListEqual([2], tree.lookup('/foo'))
+
+    def test_lookup_pattern(self):
+        tree = RoutesTree([Route('/foo/{bar}'), Route('{foo}'), Route('/')])
+        self.assertListEqual([0, 1, 2], tree.lookup('/foo/bar'))
+        self.assertListEqual([1, 2], tree.lookup('/bar'))
+
+    def test_match_after_append(self):
+        routes = Routes([Route('/foo')])
+        self.assertListEqual([], list(routes.match('/bar')))
+        route = Route('/bar')
+        routes.append(route)
+        self.assertListEqual([(route, '', {})], list(routes.match('/bar')))
+
+    def test_match_after_changes(self):
+        foo, bar, baz = Route('/foo'), Route('/bar'), Route('/baz')
+        for combined in (False, True):
+            routes = Routes([foo], combined=combined)
+            self.assertListEqual([(foo, '', {})], list(routes.match('/foo')))
+            routes[0] = bar
+            self.assertListEqual([], list(routes.match('/foo')))
+            self.assertListEqual([(bar, '', {})], list(routes.match('/bar')))
+            routes[:] = [baz]
+            self.assertListEqual([(baz, '', {})], list(routes.match('/baz')))
+            routes.insert(0, foo)
+            routes.remove(baz)
+            self.assertListEqual([], list(routes.match('/baz')))
+            self.assertListEqual([(foo, '', {})], list(routes.match('/foo')))
+            routes.extend([bar, Route('/{name}')])
+            routes.reverse()
+            self.assertListEqual(
+                ['/{name}', '/bar'],
+                [route.path for route, _, _ in routes.match('/bar')],
+            )
+            del routes[0]
+            routes.pop()
+            self.assertListEqual([(bar, '', {})], list(routes.match('/bar')))
+
+    def test_revision_changed(self):
+        routes = Routes([Route('/foo')])
+        revision = Routes.revision
+        routes[0] = Route('/bar')
+        self.assertNotEqual(revision, Routes.revision)
+
+
+class RoutesPatternTestCase(unittest.TestCase):
+
+    def test_match_empty(self):
+        pattern = RoutesPattern([Route('/foo')])
+        self.assertListEqual([], list(pattern.match('/foo')))
+
+    def test_match_first(self):
+        pattern = RoutesPattern([
+            Route('/{foo}/bar'),
+            Route('/foo'),
+            Route('/{foo}/{bar}', params=dict(baz='baz')),
+        ])
+        self.assertListEqual(
+            [(2, '', dict(foo='foo', bar='baz', baz='baz'))],
+            list(pattern.match('/foo/baz')),
+        )
+
+    def test_match_backtracking(self):
+        pattern = RoutesPattern([
+            Route('/{foo}/bar'),
+            Route('/{bar}'),
+            Route('/{baz}/'),
+        ])
+        self.assertListEqual(
+            [
+                (0, '', dict(foo='foo')),
+                (1, '/bar', dict(bar='foo')),
+                (2, 'bar', dict(baz='foo')),
+            ],
+            list(pattern.match('/foo/bar')),
+        )
+
+    def test_match_chunks(self):
+        routes = [Route('/{foo}/%d/' % index) for index in range(100)]
+        pattern = RoutesPattern(routes)
+        self.assertGreater(len(pattern.chunks), 1)
+        self.assertListEqual(
+            [(99, '', dict(foo='foo'))],
+            list(pattern.match('/foo/99/')),
+        )
+
+    def test_match_same_params_names(self):
+        pattern = RoutesPattern([
+            Route('/{foo}/bar', patterns=dict(foo=r'(?P<x>\w)(?P=x)')),
+            Route('/{foo}/baz', patterns=dict(foo=r'(?P<x>\w)(?P=x)')),
+        ])
+        self.assertListEqual(
+            [(1, '', dict(foo='aa', x='a'))],
+            list(pattern.match('/aa/baz')),
+        )
+
+
+class CombinedRoutesTestCase(unittest.TestCase):
+
+    def test_match_order(self):
+        routes = Routes([
+            Route('/foo/bar'),
+            Route('/{foo}/bar'),
+            Route('/foo'),
+            Route('/{foo}'),
+        ], combined=True)
+        self.assertListEqual(
+            [
+                (routes[0], '', {}),
+                (routes[1], '', dict(foo='foo')),
+                (routes[2], '/bar', {}),
+                (routes[3], '/bar', dict(foo='foo')),
+            ],
+            list(routes.match('/foo/bar')),
+        )
+
+
+class RoutePathTestCase(unittest.TestCase):
+
+    def test_static(self):
+        path = RoutePath([Route('/foo'), Route('/bar')])
+        self.assertEqual('/foo/bar', path.path)
+        self.assertEqual('/foo/bar', path())
+
+    def test_params(self):
+        path = RoutePath([Route('/{foo}'), Route('/{bar:int}/{{baz}}')])
+        self.assertTupleEqual(('foo', 'bar'), path.params)
+        self.assertEqual('/1/2/{baz}', path(foo=1, bar=2))
+
+    def test_positional_params(self):
+        path = RoutePath([Route('/{foo}'), Route('/{bar}')])
+        self.assertEqual('/1/2', path(1, 2))
+        self.assertEqual('/1/2', path(1, bar=2))
+
+    def test_missing_params(self):
+        path = RoutePath([Route('/{foo}'), Route('/{bar}')])
+        with self.assertRaises(ValueError) as context:
+            path(foo=1)
+        self.assertIn('bar', str(context.exception))
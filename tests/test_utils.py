@@ -4,7 +4,7 @@ try:
 except ImportError:
     import unittest
 
-from marnadi.utils import Lazy
+from marnadi.utils import Lazy, LRUCache, cached_property, codecs
 
 try:
     str = unicode
@@ -160,3 +160,155 @@ class LazyTestCase(unittest.TestCase):
         lazy = Lazy('marnadi.http')
         self.assertIsInstance(lazy, types.ModuleType)
         self.assertEqual('marnadi.http', lazy.__name__)
+
+
+class LazyResolveTestCase(unittest.TestCase):
+
+    def test_resolve(self):
+        lazy_list = Lazy('%s._test_list' % __name__)
+        self.assertIs(_test_list, Lazy.resolve(lazy_list))
+
+    def test_resolve_not_lazy(self):
+        self.assertIs(_test_list, Lazy.resolve(_test_list))
+
+    def test_get_path(self):
+        path = '%s._test_list' % __name__
+        self.assertEqual(path, Lazy.get_path(Lazy(path)))
+        self.assertIsNone(Lazy.get_path(_test_list))
+
+
+class CachedPropertyTestCase(unittest.TestCase):
+
+    class _Slotted(object):
+
+        __slots__ = 'calls', '__weakref__'
+
+        def __init__(self):
+            self.calls = 0
+
+        @cached_property
+        def value(self):
+            self.calls += 1
+            return self.calls
+
+    class _SlottedWithDict(_Slotted):
+
+        __slots__ = '__dict__',
+
+    def _test_cached(self, instance):
+        self.assertEqual(1, instance.value)
+        self.assertEqual(1, instance.value)
+        instance.value = 42
+        self.assertEqual(42, instance.value)
+        del instance.value
+        self.assertEqual(2, instance.value)
+
+    def test_weak_storage(self):
+        instance = self._Slotted()
+        self._test_cached(instance)
+        self.assertIn(instance, type(self)._Slotted.value.cache)
+
+    def test_dict_storage(self):
+        instance = self._SlottedWithDict()
+        self._test_cached(instance)
+        self.assertEqual(0, len(type(self)._SlottedWithDict.value.cache))
+        self.assertEqual(1, len(instance.__dict__))
+
+
+class LRUCacheTestCase(unittest.TestCase):
+
+    def test_get(self):
+        cache = LRUCache(size=2)
+        cache['foo'] = 1
+        self.assertEqual(1, cache.get('foo'))
+        self.assertIsNone(cache.get('bar'))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_getitem(self):
+        cache = LRUCache(size=2)
+        cache['foo'] = None
+        self.assertIsNone(cache['foo'])
+        with self.assertRaises(KeyError):
+            cache['bar']
+
+    def test_discard_least_recently_used(self):
+        cache = LRUCache(size=2)
+        cache['foo'] = 1
+        cache['bar'] = 2
+        cache.get('foo')
+        cache['baz'] = 3
+        self.assertEqual(2, len(cache))
+        self.assertIn('foo', cache)
+        self.assertNotIn('bar', cache)
+        self.assertIn('baz', cache)
+
+    def test_update(self):
+        cache = LRUCache(size=2)
+        cache['foo'] = 1
+        cache['bar'] = 2
+        cache['foo'] = 3
+        cache['baz'] = 4
+        self.assertEqual(3, cache['foo'])
+        self.assertNotIn('bar', cache)
+
+    def test_size_one(self):
+        cache = LRUCache(size=1)
+        cache['foo'] = 1
+        cache['bar'] = 2
+        self.assertNotIn('foo', cache)
+        self.assertEqual(2, cache['bar'])
+
+    def test_clear(self):
+        cache = LRUCache(size=2)
+        cache['foo'] = 1
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        cache['bar'] = 2
+        self.assertEqual(2, cache['bar'])
+
+
+class JSONCodecTestCase(unittest.TestCase):
+
+    def test_default_codec(self):
+        codec = codecs.get_default_json_codec()
+        self.assertIs(codec, codecs.get_default_json_codec())
+        self.assertIn(codec.name, dict(codecs.json_codecs))
+        data = codec.dumps({'foo': ['bar', 1]})
+        self.assertIsInstance(data, bytes)
+        self.assertEqual({'foo': ['bar', 1]}, codec.loads(data))
+
+    def test_json_codec(self):
+        codec = codecs.get_json_codec('json')
+        self.assertEqual('json', codec.name)
+        self.assertEqual(b'{"foo":[1,2]}', codec.dumps({'foo': [1, 2]}))
+        self.assertEqual({'foo': [1, 2]}, codec.loads(b'{"foo": [1, 2]}'))
+        with self.assertRaises(ValueError):
+            codec.loads(b'{"foo"')
+
+    def test_json_codec_non_ascii(self):
+        codec = codecs.get_json_codec('json')
+        expected = b'{"foo":"caf\xc3\xa9"}'
+        self.assertEqual(
+            expected,
+            codec.dumps({'foo': b'caf\xc3\xa9'.decode('utf-8')}),
+        )
+        if isinstance('', bytes):  # Python 2 native strings
+            self.assertEqual(expected, codec.dumps({'foo': 'caf\xc3\xa9'}))
+
+    def test_fallback(self):
+        def unavailable():
+            raise ImportError('foo')
+        json_codecs = list(codecs.json_codecs)
+        try:
+            codecs.register_json_codec('foo', unavailable)
+            self.assertEqual('foo', codecs.json_codecs[0][0])
+            self.assertEqual(
+                'json',
+                codecs.get_json_codec('foo', 'json').name,
+            )
+            with self.assertRaises(ImportError):
+                codecs.get_json_codec('foo')
+        finally:
+            codecs.json_codecs[:] = json_codecs
+            codecs.set_default_json_codec(None)
@@ -1,3 +1,4 @@
+import io
 try:
     import unittest2 as unittest
 except ImportError:
@@ -8,8 +9,9 @@ except ImportError:
     import mock
 
 from marnadi import Response, Route, http
+from marnadi.route import Routes
 from marnadi.utils import Lazy
-from marnadi.wsgi import App
+from marnadi.wsgi import App, Request
 
 _test_handler = Response
 
@@ -60,12 +62,13 @@ class AppTestCase(unittest.TestCase):
         requested_path,
         expected_kwargs=None,
     ):
-        app = App(routes=routes)
-        partial = app.get_handler(requested_path)
-        actual_handler = partial.func.__self__
-        self.assertIs(actual_handler, self.expected_handler)
-        self.assertIsNot(actual_handler, self.unexpected_handler)
-        self.assertDictEqual(expected_kwargs or {}, partial.keywords)
+        for combined in (False, True):
+            app = App(routes=Routes(routes, combined=combined))
+            partial = app.get_handler(requested_path)
+            actual_handler = partial.func.__self__
+            self.assertIs(actual_handler, self.expected_handler)
+            self.assertIsNot(actual_handler, self.unexpected_handler)
+            self.assertDictEqual(expected_kwargs or {}, partial.keywords)
 
     def test_get_handler__empty_route_handler_error(self):
         with self.assertRaises(http.Error) as context:
@@ -618,9 +621,270 @@ class AppTestCase(unittest.TestCase):
             )
         self.assertEqual('404 Not Found', context.exception.status)
 
+    def test_get_handler__nested_empty_routes_error(self):
+        with self.assertRaises(http.Error) as context:
+            self._test_get_handler(
+                routes=(
+                    Route('a', self.unexpected_handler),
+                ),
+                requested_path='aa',
+            )
+        self.assertEqual('404 Not Found', context.exception.status)
+
+    def test_find_handler__not_found(self):
+        app = App([
+            Route('/foo', routes=(
+                Route('/bar', self.unexpected_handler),
+            )),
+        ])
+        self.assertIsNone(app.find_handler('/foo/baz'))
+        self.assertIsNone(app.find_handler('/baz'))
+
+    def test_find_handler__backtracking_raises_no_errors(self):
+        app = App([
+            Route('/foo', routes=(
+                Route('/bar', self.unexpected_handler),
+            )),
+            Route('/foo/baz', self.expected_handler),
+        ])
+        with mock.patch.object(http, 'Error') as error:
+            partial = app.find_handler('/foo/baz')
+        self.assertIs(self.expected_handler, partial.func.__self__)
+        self.assertFalse(error.called)
+
+    def test_get_handler__cached(self):
+        app = App([Route('/{foo}', self.expected_handler)], cache_size=10)
+        partial = app.get_handler('/foo')
+        self.assertIs(partial, app.get_handler('/foo'))
+        self.assertDictEqual(dict(foo='foo'), partial.keywords)
+        self.assertEqual(1, app.cache.hits)
+        self.assertEqual(1, app.cache.misses)
+
+    def test_get_handler__cached_not_found(self):
+        app = App([Route('/foo', self.expected_handler)], cache_size=10)
+        for _ in range(2):
+            with self.assertRaises(http.Error):
+                app.get_handler('/bar')
+        self.assertEqual(0, len(app.cache))
+        app = App([Route('/foo', self.expected_handler)], cache_size=10,
+                  cache_not_found=True)
+        for _ in range(2):
+            with self.assertRaises(http.Error):
+                app.get_handler('/bar')
+        self.assertEqual(1, len(app.cache))
+        self.assertEqual(1, app.cache.hits)
+
+    def test_get_handler__cache_invalidated_by_route(self):
+        route = Route('/foo')
+        app = App([route], cache_size=10, cache_not_found=True)
+        with self.assertRaises(http.Error):
+            app.get_handler('/foo/bar')
+        route.routes.route('/bar')(self.expected_handler)
+        partial = app.get_handler('/foo/bar')
+        self.assertIs(self.expected_handler, partial.func.__self__)
+
+    def test_make_path(self):
+        app = App([
+            Route('/foo', name='foo', routes=(
+                Route('/{bar}', name='bar', routes=(
+                    Route('/{baz:int}', name='baz'),
+                )),
+            )),
+        ])
+        self.assertEqual('/foo', app.make_path('foo'))
+        self.assertEqual('/foo/1', app.make_path('bar', bar=1))
+        self.assertEqual('/foo/1/2', app.make_path('baz', bar=1, baz=2))
+        self.assertEqual('/foo/1/2', app.make_path('baz', 1, 2))
+
+    def test_make_path__missing_params(self):
+        app = App([Route('/{foo}', name='foo')])
+        with self.assertRaises(ValueError):
+            app.make_path('foo')
+
+    def test_warmup(self):
+        handler_path = '%s._test_handler' % __name__
+        app = App([Route('/', routes=(Route('a', handler_path), ))])
+        timings = app.warmup()
+        self.assertIn(handler_path, timings)
+        self.assertIn(
+            'marnadi.http.data.decoders.application.json.Decoder',
+            timings,
+        )
+
+    def test_warmup__bad_path(self):
+        app = App([Route('/', '%s._unknown_handler' % __name__)])
+        with self.assertRaises(ImportError):
+            app.warmup()
+
+    def test_preload__bad_path(self):
+        with self.assertRaises(ImportError):
+            App([Route('/', 'marnadi.unknown_module.handler')], preload=True)
+
     def test_route(self):
         app = App()
         handler = app.route('/{foo}', params=dict(kwarg='kwarg'))(Response)
         self.assertIs(handler, Response)
         partial = app.get_handler('/foo')
         self.assertDictEqual(dict(kwarg='kwarg', foo='foo'), partial.keywords)
+
+    def test_call__custom_handler_without_body(self):
+        class CustomResponse(list):
+            status = '200 OK'
+            headers = http.Headers(('Content-Length', '5'))
+
+        class CustomHandler(object):
+            @staticmethod
+            def start(*args, **kwargs):
+                return CustomResponse([b'hello'])
+
+        app = App([Route('/', CustomHandler)])
+        start_response = mock.Mock()
+        body = app(dict(REQUEST_METHOD='GET', PATH_INFO='/'), start_response)
+        start_response.assert_called_once_with(
+            '200 OK', [('Content-Length', '5')])
+        self.assertListEqual([b'hello'], body)
+
+
+class RequestTestCase(unittest.TestCase):
+
+    def test_headers(self):
+        request = Request({
+            'CONTENT_TYPE': 'text/plain',
+            'CONTENT_LENGTH': '5',
+            'HTTP_X_FOO': 'foo',
+            'HTTP_COOKIE': 'foo=bar',
+            'PATH_INFO': '/',
+        })
+        self.assertEqual('foo', request.headers['X-Foo'])
+        self.assertEqual('foo', request.headers['x-foo'])
+        self.assertEqual('foo=bar', request.headers.get('Cookie'))
+        self.assertEqual('text/plain', request.headers['Content-Type'])
+        self.assertIsNone(request.headers.get('Authorization'))
+        self.assertNotIn('Path-Info', request.headers)
+        self.assertDictEqual(
+            {
+                'Content-Type': 'text/plain',
+                'Content-Length': '5',
+                'X-Foo': 'foo',
+                'Cookie': 'foo=bar',
+            },
+            dict(request.headers),
+        )
+
+    def test_headers_read_lazily(self):
+        environ = mock.MagicMock()
+        environ.__getitem__.return_value = 'foo'
+        request = Request(environ)
+        self.assertEqual('foo', request.headers['Authorization'])
+        self.assertEqual('foo', request.headers['Authorization'])
+        environ.__getitem__.assert_called_once_with('HTTP_AUTHORIZATION')
+        self.assertFalse(environ.items.called)
+
+    def test_query(self):
+        request = Request(dict(QUERY_STRING='foo=1&bar=&foo=2'))
+        self.assertEqual('2', request.query['foo'])
+        self.assertEqual('', request.query['bar'])
+        self.assertListEqual(['1', '2'], request.query.getall('foo'))
+        self.assertListEqual([], request.query.getall('baz'))
+        self.assertSetEqual(set(['foo', 'bar']), set(request.query))
+        self.assertIs(request.query, request.query)
+
+    def test_query_empty(self):
+        request = Request({})
+        self.assertEqual(0, len(request.query))
+        self.assertIsNone(request.query.get('foo'))
+
+    def test_query_parsed_lazily(self):
+        with mock.patch.object(http.query.parse, 'parse_qsl') as parse_qsl:
+            parse_qsl.return_value = [('foo', 'bar')]
+            query = Request(dict(QUERY_STRING='foo=bar')).query
+            self.assertFalse(parse_qsl.called)
+            self.assertEqual('bar', query['foo'])
+            self.assertEqual('bar', query['foo'])
+            self.assertEqual(1, parse_qsl.call_count)
+
+    def test_query_max_fields(self):
+        request_type = type('', (Request, ), dict(query=http.Query(
+            max_fields=2)))
+        request = request_type(dict(QUERY_STRING='a=1&b=2'))
+        self.assertEqual('2', request.query['b'])
+        with self.assertRaises(http.Error) as context:
+            request_type(dict(QUERY_STRING='a=1&b=2&c=3')).query
+        self.assertEqual('400 Bad Request', context.exception.status)
+        for query_string in ('a=1;b=2;c=3', 'a=1&b=2;c=3'):
+            with self.assertRaises(http.Error) as context:
+                request_type(dict(QUERY_STRING=query_string)).query
+            self.assertEqual('400 Bad Request', context.exception.status)
+
+    def test_query_max_length(self):
+        request_type = type('', (Request, ), dict(query=http.Query(
+            max_length=5)))
+        with self.assertRaises(http.Error) as context:
+            request_type(dict(QUERY_STRING='foo=bar')).query
+        self.assertEqual('414 Request-URI Too Long', context.exception.status)
+
+    def test_stream(self):
+        request = Request({
+            'wsgi.input': io.BytesIO(b'hello world'),
+            'CONTENT_LENGTH': '8',
+        })
+        self.assertListEqual(
+            [b'hel', b'lo ', b'wo'],
+            list(request.stream(chunk_size=3)),
+        )
+
+    def test_stream_without_length(self):
+        request = Request({
+            'wsgi.input': io.BytesIO(b'hello'),
+        })
+        self.assertListEqual([], list(request.stream()))
+
+    def test_stream_terminated_input(self):
+        request = Request({
+            'wsgi.input': io.BytesIO(b'hello'),
+            'wsgi.input_terminated': True,
+        })
+        self.assertListEqual(
+            [b'hel', b'lo'],
+            list(request.stream(chunk_size=3)),
+        )
+
+    def test_stream_terminated_input_max_size(self):
+        for max_stream_size, max_body_size in ((4, None), (10, 4), (4, 10)):
+            request = Request({
+                'wsgi.input': io.BytesIO(b'hello'),
+                'wsgi.input_terminated': True,
+            })
+            request.max_stream_size = max_stream_size
+            request.max_body_size = max_body_size
+            with self.assertRaises(http.Error) as context:
+                list(request.stream(chunk_size=3))
+            self.assertEqual(
+                '413 Request Entity Too Large',
+                context.exception.status,
+            )
+
+    def test_stream_incomplete_input(self):
+        request = Request({
+            'wsgi.input': io.BytesIO(b'hello'),
+            'CONTENT_LENGTH': '10',
+        })
+        self.assertListEqual([b'hello'], list(request.stream()))
+
+    def test_stream_default_chunk_size(self):
+        request = Request({
+            'wsgi.input': io.BytesIO(b'a' * (Request.chunk_size + 1)),
+            'CONTENT_LENGTH': str(Request.chunk_size + 1),
+        })
+        self.assertListEqual(
+            [Request.chunk_size, 1],
+            [len(chunk) for chunk in request.stream()],
+        )
+
+    def test_data_terminated_input(self):
+        request = Request({
+            'wsgi.input': io.BytesIO(b'{"foo": "bar"}'),
+            'wsgi.input_terminated': True,
+            'CONTENT_TYPE': 'application/json',
+        })
+        self.assertDictEqual(dict(foo='bar'), request.data)